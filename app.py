@@ -1,16 +1,36 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import matplotlib.pyplot as plt
 import plotly.express as px
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
+import plotly.graph_objects as go
 from datetime import datetime
-import base64
+from functools import partial
+import os
 from io import BytesIO
 
+from financeapp.backtest import DEFAULT_GRID, backtest, sweep, to_matrices
+from financeapp.charts import (
+    bin2d, downsample, ohlc_rule, points_for_width, resample_ohlc, window_mask
+)
+from financeapp.datasets import STAGES, DatasetStore, derive_version
+from financeapp.export import EXPORT_FORMATS, ExportCache, frame_batches
+from financeapp.features import FeatureEngine, available_specs
+from financeapp.ingest import DatasetHandle, ingest_csv
+from financeapp.models import (
+    MODELS, ModelCache, SearchJob, artifact_key, feature_weights, make_model, param_candidates
+)
+from financeapp.online import OnlinePipeline
+from financeapp.panel import TICKER_COL, build_panel, parse_tickers, preprocess
+from financeapp.pipeline import build_features, evaluate, load_prices
+from financeapp.price_store import PriceStore, completed_end
+from financeapp.profiling import Profiler, stage
+from financeapp.registry import ModelRegistry
+from financeapp.validation import time_split, walk_forward
+
+# Derived frames share unchanged columns with their parent snapshot
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 # Set page configuration
 st.set_page_config(
     page_title="Financial ML App",
@@ -58,33 +78,243 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state variables
-if 'df' not in st.session_state:
-    st.session_state.df = None
-if 'processed' not in st.session_state:
-    st.session_state.processed = False
+if 'versions' not in st.session_state:
+    st.session_state.versions = {}
 if 'features' not in st.session_state:
     st.session_state.features = None
 if 'target' not in st.session_state:
     st.session_state.target = None
-if 'X_train' not in st.session_state:
-    st.session_state.X_train = None
-if 'X_test' not in st.session_state:
-    st.session_state.X_test = None
-if 'y_train' not in st.session_state:
-    st.session_state.y_train = None
-if 'y_test' not in st.session_state:
-    st.session_state.y_test = None
+if 'train_idx' not in st.session_state:
+    st.session_state.train_idx = None
+if 'test_idx' not in st.session_state:
+    st.session_state.test_idx = None
+if 'split_version' not in st.session_state:
+    st.session_state.split_version = None
 if 'model' not in st.session_state:
     st.session_state.model = None
+if 'model_split' not in st.session_state:
+    st.session_state.model_split = None
+if 'model_key' not in st.session_state:
+    st.session_state.model_key = None
+if 'pending_split' not in st.session_state:
+    st.session_state.pending_split = None
+if 'predictions' not in st.session_state:
+    st.session_state.predictions = None
+if 'chart_width' not in st.session_state:
+    st.session_state.chart_width = 1200
+if 'tickers' not in st.session_state:
+    st.session_state.tickers = None
+if 'online' not in st.session_state:
+    st.session_state.online = None
 if 'ticker' not in st.session_state:
     st.session_state.ticker = None
+if 'dataset' not in st.session_state:
+    st.session_state.dataset = None
+if 'upload_id' not in st.session_state:
+    st.session_state.upload_id = None
+if 'walk_forward' not in st.session_state:
+    st.session_state.walk_forward = None
+if 'search_job' not in st.session_state:
+    st.session_state.search_job = None
+if 'model_results' not in st.session_state:
+    st.session_state.model_results = None
+if 'profiler' not in st.session_state:
+    st.session_state.profiler = Profiler()
+
+# Shared on-disk price cache, created once per server process
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+# Memoized indicator engine shared by all sessions
+@st.cache_resource
+def get_feature_engine():
+    return FeatureEngine()
+
+# Fitted models keyed by (model, params, features, split), shared by all sessions
+@st.cache_resource
+def get_model_cache():
+    return ModelCache()
+
+# Registered models on disk, served by `python -m financeapp serve`
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry()
+
+# Poll the background training job without rerunning the whole page
+@st.fragment(run_every=1.0)
+def show_training_progress():
+    job = st.session_state.search_job
+    if job is None:
+        return
+    if not job.finished:
+        if job.total:
+            st.progress(job.done / job.total, text=f"Evaluated {job.done} of {job.total} candidates...")
+        else:
+            st.info(f"Training {job.name}...")
+        if st.button("Cancel Training"):
+            job.cancel()
+    elif job.status == "done":
+        if st.session_state.model is not job.model:
+            st.session_state.profiler.add("train", job.seconds, len(job.y_train))
+            st.session_state.model = job.model
+            st.session_state.model_key = job.cache_key
+            st.session_state.model_split = st.session_state.pending_split
+            st.session_state.model_results = job.results_frame()
+            st.rerun()
+        best = f" with {job.best_params}" if job.best_params else ""
+        st.success(f"{job.name} trained successfully{best} in {job.seconds:.1f}s!")
+    elif job.status == "cancelled":
+        st.warning("Training was cancelled.")
+    else:
+        st.error(f"Training failed: {job.error}")
+
+# Ingested Parquet files are read once per server process, memory-mapped
+@st.cache_resource(max_entries=2)
+def read_dataset(path):
+    return DatasetHandle(path).read()
+
+# Immutable dataset versions shared by all sessions, keyed by content hash
+@st.cache_resource
+def get_dataset_store():
+    return DatasetStore()
+
+# The session keeps only version hashes; frames live in the snapshot store
+def snapshot(stage):
+    version = st.session_state.versions.get(stage)
+    return get_dataset_store().get(version) if version else None
+
+# Feature frames are snapshots too, so reruns reuse them until the input version changes
+def featurize(frame, specs, close_col):
+    frame, columns = build_features(frame, list(specs), close_col, get_feature_engine(),
+                                    profiler=st.session_state.profiler)
+    return frame, {"specs": list(specs), "close_col": close_col, "columns": columns}
 
-# Helper function to download data
-def get_table_download_link(df):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="financial_data.csv">Download CSV File</a>'
-    return href
+def latest_snapshot():
+    for stage in reversed(STAGES):
+        snap = snapshot(stage)
+        if snap is not None:
+            return snap
+    return None
+
+def clear_split():
+    st.session_state.train_idx = None
+    st.session_state.test_idx = None
+    st.session_state.split_version = None
+
+# Start a new dataset; every downstream version belongs to the old one
+def set_raw(snap):
+    st.session_state.versions = {"raw": snap.version}
+    st.session_state.online = None
+    st.session_state.features = None
+    st.session_state.walk_forward = None
+    clear_split()
+
+# Record a new version for a stage and drop later stages built from another one
+def set_snapshot(snap):
+    versions = st.session_state.versions
+    versions[snap.stage] = snap.version
+    parent = snap.version
+    for stage in STAGES[STAGES.index(snap.stage) + 1:]:
+        child = snapshot(stage)
+        if child is None or child.parent != parent:
+            for later in STAGES[STAGES.index(stage):]:
+                versions.pop(later, None)
+            break
+        parent = child.version
+    if 'featured' not in versions:
+        st.session_state.features = None
+        st.session_state.walk_forward = None
+        clear_split()
+
+# Directory whose CSV files can be ingested without uploading them
+SERVER_CSV_DIR = os.environ.get("FINANCEAPP_CSV_DIR")
+
+# Scatter plots above this many points are drawn as 2D histograms
+SCATTER_BIN_THRESHOLD = 5000
+
+# Reduced series are cached per dataset version, zoom window and pixel budget
+@st.cache_data(max_entries=128, show_spinner=False)
+def reduced_lines(version, _frame, y_col, window, max_points):
+    in_window = _frame[window_mask(_frame['Date'], *window)]
+    groups = in_window.groupby(TICKER_COL, observed=True) if TICKER_COL in in_window.columns else [(None, in_window)]
+    pieces = []
+    for ticker, group in groups:
+        x, y = downsample(group['Date'].to_numpy(), group[y_col].to_numpy(), max_points)
+        pieces.append(pd.DataFrame({'Date': x, y_col: y, TICKER_COL: ticker}))
+    return pd.concat(pieces, ignore_index=True) if pieces else pd.DataFrame(columns=['Date', y_col, TICKER_COL])
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def reduced_ohlc(version, _frame, ticker, window, max_bars):
+    frame = _frame if ticker is None else _frame[_frame[TICKER_COL] == ticker]
+    frame = frame[window_mask(frame['Date'], *window)]
+    if frame.empty:
+        return frame, None
+    rule = ohlc_rule(frame['Date'].min(), frame['Date'].max(), max_bars)
+    return resample_ohlc(frame, rule), rule
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def reduced_xy(key, _x, _y, window, max_points):
+    mask = window_mask(_x, *window)
+    return downsample(np.asarray(_x)[mask], np.asarray(_y)[mask], max_points)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def binned_scatter(key, _x, _y, bins):
+    return bin2d(_x, _y, bins)
+
+# Date range slider; narrowing it re-fetches that window at full resolution
+def zoom_window(dates, key):
+    lo, hi = pd.Timestamp(dates.min()).to_pydatetime(), pd.Timestamp(dates.max()).to_pydatetime()
+    if lo == hi:
+        return (lo, hi)
+    return st.slider("Zoom window:", min_value=lo, max_value=hi, value=(lo, hi), format="YYYY-MM-DD", key=key)
+
+def show_price_chart(snap, close_col, title):
+    df = snap.frame
+    window = zoom_window(df['Date'], key=f"zoom_{snap.version}")
+    has_ohlc = all(c in df.columns for c in ('Open', 'High', 'Low', 'Close'))
+    chart_type = st.radio("Chart type:", ("Line", "Candlestick"), horizontal=True) if has_ohlc else "Line"
+    
+    if chart_type == "Line":
+        with stage(st.session_state.profiler, "chart_prep", len(df)):
+            lines = reduced_lines(snap.version, df, close_col, window, points_for_width(st.session_state.chart_width))
+        fig = px.line(lines, x='Date', y=close_col,
+                      color=TICKER_COL if TICKER_COL in df.columns else None,
+                      title=title)
+    else:
+        ticker = None
+        if TICKER_COL in df.columns:
+            ticker = st.selectbox("Ticker:", list(df[TICKER_COL].unique()))
+        # Aim for a few pixels per candle and resample to coarser bars when needed
+        with stage(st.session_state.profiler, "chart_prep", len(df)):
+            bars, rule = reduced_ohlc(snap.version, df, ticker, window, max(1, st.session_state.chart_width // 4))
+        fig = go.Figure(go.Candlestick(
+            x=bars['Date'], open=bars['Open'], high=bars['High'], low=bars['Low'], close=bars['Close']
+        ))
+        fig.update_layout(title=f"{ticker or title} ({rule} bars)", xaxis_rangeslider_visible=False)
+    with stage(st.session_state.profiler, "chart_render"):
+        st.plotly_chart(fig)
+
+# Export files on disk, cached by dataset version and format
+@st.cache_resource
+def get_export_cache():
+    return ExportCache()
+
+# Download button whose file is only written (once per version) when clicked
+def export_button(snap, fmt):
+    cache = get_export_cache()
+    extension, mime = EXPORT_FORMATS[fmt]
+    if not snap.loaded and st.session_state.dataset is not None:
+        batches = st.session_state.dataset.iter_batches
+    else:
+        batches = partial(frame_batches, snap.frame)
+    st.download_button(
+        f"Download {fmt} File",
+        data=lambda: cache.read(snap.version, batches, fmt),
+        file_name=f"financial_data.{extension}",
+        mime=mime,
+        on_click="ignore"
+    )
 
 # Welcome Interface
 st.title("📈 Financial Machine Learning Application")
@@ -100,19 +330,50 @@ st.image("data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD/2wCEAAkGBwgHBgkIBwg
 with st.sidebar:
     st.header("Data Loading Options")
     data_source = st.radio("Select data source:", 
-                          ("Upload Kragle Dataset", "Fetch from Yahoo Finance"))
+                          ("Upload Kragle Dataset", "Fetch from Yahoo Finance", "Yahoo Finance Universe"))
     
     if data_source == "Upload Kragle Dataset":
         uploaded_file = st.file_uploader("Upload your CSV file", type=["csv"])
-        if uploaded_file is not None:
+        # Server-side files are only offered from a directory the operator configured
+        csv_path = ""
+        if SERVER_CSV_DIR and os.path.isdir(SERVER_CSV_DIR):
+            csv_name = st.selectbox(
+                "Or pick a CSV file on the server:",
+                [""] + sorted(f for f in os.listdir(SERVER_CSV_DIR) if f.lower().endswith(".csv"))
+            )
+            csv_path = os.path.join(SERVER_CSV_DIR, csv_name) if csv_name else ""
+        source = uploaded_file if uploaded_file is not None else csv_path
+        source_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name if uploaded_file else source)
+        # Ingest each file once; reruns keep the handle instead of re-reading the CSV
+        if source and source_id != st.session_state.upload_id:
             try:
-                df = pd.read_csv(uploaded_file)
-                st.session_state.df = df
-                st.session_state.processed = False
+                with st.spinner("Ingesting CSV in chunks..."), stage(st.session_state.profiler, "ingest") as timing:
+                    handle = ingest_csv(source, name=getattr(uploaded_file, 'name', None))
+                    timing["rows"] = handle.report['rows']
+                st.session_state.dataset = handle
+                st.session_state.upload_id = source_id
+                set_raw(get_dataset_store().put_lazy(
+                    handle.report['content_hash'], lambda path=handle.path: read_dataset(path)
+                ))
                 st.session_state.ticker = None
+                st.session_state.tickers = None
                 st.success("Kragle dataset loaded successfully!")
             except Exception as e:
                 st.error(f"Error loading file: {e}")
+        
+        if st.session_state.dataset is not None:
+            report = st.session_state.dataset.report
+            st.caption(
+                f"{report['rows']:,} rows in {report['chunks']} chunks, {report['seconds']:.1f}s. "
+                f"CSV {report['csv_bytes'] / 1e6:.1f} MB → Parquet {report['parquet_bytes'] / 1e6:.1f} MB. "
+                f"Peak RSS {report['peak_rss'] / 1e6:.0f} MB "
+                f"(+{(report['peak_rss'] - report['start_rss']) / 1e6:.0f} MB during ingestion)."
+            )
+            if report.get('widened'):
+                st.warning(
+                    "Widened because later rows did not fit the first chunk's type: "
+                    + ", ".join(f"{column} → {kind}" for column, kind in report['widened'].items())
+                )
     
     elif data_source == "Fetch from Yahoo Finance":
         ticker = st.text_input("Enter stock ticker (e.g., AAPL):", "AAPL")
@@ -121,25 +382,63 @@ with st.sidebar:
         
         if st.button("Fetch Data"):
             try:
-                data = yf.download(ticker, start=start_date, end=end_date)
+                with stage(st.session_state.profiler, "load") as timing:
+                    data = get_price_store().get(ticker, start_date, end_date)
+                    timing["rows"] = len(data)
                 if not data.empty:
-                    # Flatten MultiIndex columns
-                    data.columns = ['_'.join(col).strip() if col[1] else col[0] for col in data.columns.values]
-                    data.reset_index(inplace=True)
+                    data = data.reset_index()
                     
                     # Calculate returns
-                    close_col = f"Close_{ticker}" if f"Close_{ticker}" in data.columns else "Close"
-                    data['Return'] = data[close_col].pct_change()
+                    data['Return'] = data['Close'].pct_change()
                     
-                    st.session_state.df = data
-                    st.session_state.processed = False
+                    set_raw(get_dataset_store().put_raw(data))
+                    st.session_state.dataset = None
+                    st.session_state.upload_id = None
                     st.session_state.ticker = ticker
+                    st.session_state.tickers = [ticker]
                     st.success(f"Successfully fetched {ticker} data from Yahoo Finance!")
                 else:
                     st.error("No data found for this ticker and date range.")
             except Exception as e:
                 st.error(f"Error fetching data: {e}")
 
+    elif data_source == "Yahoo Finance Universe":
+        tickers_text = st.text_area("Enter tickers (comma or space separated):", "AAPL, MSFT, GOOGL, AMZN")
+        start_date = st.date_input("Start date:", datetime(2020, 1, 1))
+        end_date = st.date_input("End date:", datetime.today())
+
+        if st.button("Fetch Universe"):
+            tickers = parse_tickers(tickers_text)
+            try:
+                prices = load_prices(tickers, start_date, end_date, store=get_price_store(),
+                                     profiler=st.session_state.profiler)
+                if not prices.empty:
+                    set_raw(get_dataset_store().put_raw(prices))
+                    st.session_state.dataset = None
+                    st.session_state.upload_id = None
+                    st.session_state.ticker = None
+                    loaded = list(prices[TICKER_COL].unique())
+                    st.session_state.tickers = loaded
+                    st.success(f"Fetched {len(loaded)} of {len(tickers)} tickers from Yahoo Finance!")
+                    missing = sorted(set(tickers) - set(loaded))
+                    if missing:
+                        st.warning(f"No data for: {', '.join(missing)}")
+                else:
+                    st.error("No data found for these tickers and date range.")
+            except Exception as e:
+                st.error(f"Error fetching data: {e}")
+
+    if data_source != "Upload Kragle Dataset":
+        cache_stats = get_price_store().stats()
+        st.caption(
+            f"Price cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+            f"{cache_stats['tickers']} tickers, {cache_stats['bytes'] / 1e6:.1f} MB"
+        )
+
+    st.header("Display Options")
+    st.slider("Chart width (pixels):", 400, 3000, step=100, key="chart_width",
+              help="Long series are downsampled to about two points per pixel.")
+
 # Main content area
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
     "Data Preview", "Preprocessing", "Feature Engineering", 
@@ -148,57 +447,71 @@ tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
 
 with tab1:
     st.header("Data Preview")
-    if st.session_state.df is not None:
+    snap = latest_snapshot()
+    if snap is not None:
         st.write("First 10 rows of the dataset:")
-        st.dataframe(st.session_state.df.head(10))
-        
-        st.write("Dataset summary statistics:")
-        st.dataframe(st.session_state.df.describe())
+        if not snap.loaded and st.session_state.dataset is not None:
+            # Ingested files are previewed straight from Parquet without loading them
+            st.dataframe(st.session_state.dataset.head(10))
+            
+            st.write("Dataset summary statistics:")
+            with stage(st.session_state.profiler, "describe", st.session_state.dataset.num_rows):
+                summary = st.session_state.dataset.describe()
+            st.dataframe(summary)
+        else:
+            st.dataframe(snap.frame.head(10))
+            
+            st.write("Dataset summary statistics:")
+            with stage(st.session_state.profiler, "describe", len(snap.frame)):
+                summary = snap.frame.describe()
+            st.dataframe(summary)
         
         # Download button
-        st.markdown(get_table_download_link(st.session_state.df), unsafe_allow_html=True)
+        export_format = st.selectbox("Export format:", list(EXPORT_FORMATS))
+        export_button(snap, export_format)
     else:
         st.warning("Please load data first using the sidebar options.")
 
 with tab2:
     st.header("Data Preprocessing")
-    if st.session_state.df is not None:
+    raw = snapshot("raw")
+    if raw is not None:
         if st.button("Start Preprocessing"):
-            df = st.session_state.df.copy()
+            df = raw.frame
             
             # Handle missing values
             missing_values = df.isnull().sum()
             st.write("Missing values before processing:")
             st.write(missing_values)
             
-            # Fill missing values
-            df.fillna(method='ffill', inplace=True)
-            df.fillna(method='bfill', inplace=True)
+            # Fill missing values within each ticker and remove outliers in returns;
+            # the same raw version is only ever preprocessed once
+            with stage(st.session_state.profiler, "preprocess", len(df)):
+                processed, _ = get_dataset_store().derive(raw, "preprocessed", {"max_abs_return": 0.5}, preprocess)
+            df = processed.frame
             
             st.write("Missing values after processing:")
             st.write(df.isnull().sum())
             
-            # Remove potential outliers in returns
-            if 'Return' in df.columns:
-                df = df[(df['Return'] > -0.5) & (df['Return'] < 0.5)]
-            
-            st.session_state.df = df
-            st.session_state.processed = True
+            set_snapshot(processed)
             st.success("Data preprocessing completed!")
-            
-            # Visualize the cleaned data
+        
+        # Visualize the cleaned data
+        processed = snapshot("preprocessed")
+        if processed is not None:
+            df = processed.frame
             close_col = f"Close_{st.session_state.ticker}" if st.session_state.ticker and f"Close_{st.session_state.ticker}" in df.columns else "Close"
             if close_col in df.columns and 'Date' in df.columns:
-                fig = px.line(df, x='Date', y=close_col, 
-                              title=f"{st.session_state.ticker if st.session_state.ticker else 'Dataset'} Closing Prices")
-                st.plotly_chart(fig)
+                show_price_chart(processed, close_col,
+                                 f"{st.session_state.ticker if st.session_state.ticker else 'Dataset'} Closing Prices")
     else:
         st.warning("Please load data first using the sidebar options.")
 
 with tab3:
     st.header("Feature Engineering")
-    if st.session_state.df is not None and st.session_state.processed:
-        df = st.session_state.df.copy()
+    processed = snapshot("preprocessed")
+    if processed is not None:
+        df = processed.frame
         
         st.write("Available columns:")
         st.write(list(df.columns))
@@ -207,25 +520,23 @@ with tab3:
         close_col = f"Close_{st.session_state.ticker}" if st.session_state.ticker and f"Close_{st.session_state.ticker}" in df.columns else "Close"
         
         if close_col in df.columns:
-            df['MA_7'] = df[close_col].rolling(window=7).mean().fillna(method='bfill')
-            df['MA_30'] = df[close_col].rolling(window=30).mean().fillna(method='bfill')
-            
-            if 'Return' in df.columns:
-                df['Volatility'] = df['Return'].rolling(window=30).std().fillna(method='bfill')
-                df['Lag1_Return'] = df['Return'].shift(1).fillna(0)
-            
-            df.dropna(inplace=True)
-            
-            st.write("New features created:")
-            st.write(df[['MA_7', 'MA_30', 'Volatility', 'Lag1_Return']].head())
-            
-            # Feature selection
-            feature_options = ['MA_7', 'MA_30', 'Volatility', 'Lag1_Return']
-            selected_features = st.multiselect(
+            # Indicators are memoized per ticker, so changing the selection only
+            # computes features that were never computed for this data before
+            feature_options = available_specs(df, close_col)
+            default_options = [f for f in ['MA_7', 'MA_30', 'Volatility', 'Lag1_Return'] if f in feature_options]
+            selected_specs = st.multiselect(
                 "Select features for modeling:", 
                 feature_options,
-                default=feature_options
+                default=default_options
             )
+            featured, _ = get_dataset_store().derive(
+                processed, "featured", {"features": tuple(selected_specs), "close_col": close_col},
+                partial(featurize, specs=tuple(selected_specs), close_col=close_col)
+            )
+            df, selected_features = featured.frame, featured.meta["columns"]
+            
+            st.write("New features created:")
+            st.write(df[selected_features].head())
             
             target = st.selectbox(
                 "Select target variable:",
@@ -233,9 +544,9 @@ with tab3:
             )
             
             if st.button("Confirm Features"):
+                set_snapshot(featured)
                 st.session_state.features = selected_features
                 st.session_state.target = target
-                st.session_state.df = df
                 st.success("Features selected successfully!")
                 
                 # Feature importance visualization
@@ -248,77 +559,232 @@ with tab3:
 
 with tab4:
     st.header("Train/Test Split")
-    if st.session_state.features is not None:
-        df = st.session_state.df.copy()
-        X = df[st.session_state.features]
-        y = df[st.session_state.target]
+    featured = snapshot("featured")
+    if featured is not None and st.session_state.features is not None:
+        df = featured.frame
         
-        test_size = st.slider("Select test size ratio:", 0.1, 0.5, 0.3)
+        split_mode = st.radio("Validation mode:", ("Chronological split", "Walk-forward backtest"))
         
-        if st.button("Split Data"):
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42
-            )
-            
-            st.session_state.X_train = X_train
-            st.session_state.X_test = X_test
-            st.session_state.y_train = y_train
-            st.session_state.y_test = y_test
-            
-            st.success("Data split successfully!")
-            
-            # Visualize the split
-            sizes = [len(X_train), len(X_test)]
-            labels = ['Train', 'Test']
+        if split_mode == "Chronological split":
+            test_size = st.slider("Select test size ratio:", 0.1, 0.5, 0.3)
             
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-            
-            ax1.pie(sizes, labels=labels, autopct='%1.1f%%')
-            ax1.set_title('Train/Test Split')
-            
-            ax2.bar(labels, sizes, color=['green', 'blue'])
-            ax2.set_title('Number of Samples')
-            ax2.set_ylabel('Count')
+            if st.button("Split Data"):
+                split_version = derive_version(featured.version, "split", {
+                    "test_size": test_size,
+                    "features": tuple(st.session_state.features),
+                    "target": st.session_state.target,
+                })
+                if split_version != st.session_state.split_version:
+                    # The most recent dates are held out so no future rows leak into training.
+                    # Only row positions are kept; rows are taken from the snapshot when needed.
+                    with stage(st.session_state.profiler, "split", len(df)):
+                        train_idx, test_idx = time_split(df, test_size)
+                    st.session_state.train_idx = train_idx
+                    st.session_state.test_idx = test_idx
+                    st.session_state.split_version = split_version
+                
+                st.success("Data split successfully!")
+                
+                # Visualize the split
+                sizes = [len(st.session_state.train_idx), len(st.session_state.test_idx)]
+                labels = ['Train', 'Test']
+                
+                import matplotlib.pyplot as plt
+                
+                fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+                
+                ax1.pie(sizes, labels=labels, autopct='%1.1f%%')
+                ax1.set_title('Train/Test Split')
+                
+                ax2.bar(labels, sizes, color=['green', 'blue'])
+                ax2.set_title('Number of Samples')
+                ax2.set_ylabel('Count')
+                
+                st.pyplot(fig)
+        else:
+            wf_model = st.selectbox("Model:", list(MODELS), key="walk_forward_model")
+            wf_params = {}
+            lag_col = f"Lag1_{st.session_state.target}"
+            if wf_model == "Persistence" and lag_col in st.session_state.features:
+                wf_params = {"lag_index": st.session_state.features.index(lag_col)}
+            col1, col2 = st.columns(2)
+            with col1:
+                n_splits = st.number_input("Number of folds:", 2, 50, 5)
+                window = st.selectbox("Training window:", ("expanding", "sliding"))
+                train_size = None
+                if window == "sliding":
+                    train_size = st.number_input("Sliding window length (dates):", 20, 5000, 252)
+            with col2:
+                gap = st.number_input("Embargo gap (dates):", 0, 100, 0)
+                refit_every = st.number_input("Refit every N folds:", 1, 50, 1)
+                n_jobs = int(st.number_input("Parallel workers:", 1, 64, 1))
+            per_ticker = False
+            if TICKER_COL in df.columns:
+                per_ticker = st.checkbox("Fit each ticker separately", value=False)
             
-            st.pyplot(fig)
+            if st.button("Run Walk-Forward"):
+                try:
+                    with st.spinner("Running walk-forward backtest..."), \
+                            stage(st.session_state.profiler, "walk_forward", len(df)):
+                        st.session_state.walk_forward = walk_forward(
+                            df, st.session_state.features, st.session_state.target,
+                            make_model(wf_model, wf_params),
+                            n_splits=int(n_splits), window=window, train_size=train_size,
+                            gap=int(gap), refit_every=int(refit_every),
+                            per_ticker=per_ticker, n_jobs=n_jobs,
+                        )
+                    st.success("Walk-forward backtest completed! See the Evaluation tab.")
+                except ValueError as e:
+                    st.error(f"Cannot run walk-forward backtest: {e}")
     else:
         st.warning("Please complete feature engineering first.")
 
 with tab5:
     st.header("Model Training")
-    if st.session_state.X_train is not None:
-        st.write("Training Linear Regression model...")
+    featured = snapshot("featured")
+    if st.session_state.train_idx is not None and featured is not None:
+        model_name = st.selectbox("Select model:", list(MODELS))
+        search_mode = st.radio(
+            "Hyperparameters:", ("default", "grid", "random"), horizontal=True,
+            format_func={"default": "Defaults", "grid": "Grid search", "random": "Random search"}.get
+        )
+        n_iter = 10
+        if search_mode == "random":
+            n_iter = st.slider("Random search candidates:", 2, 50, 10)
+        n_jobs = 1
+        if search_mode != "default":
+            n_jobs = int(st.number_input("Search workers:", 1, 64, min(4, os.cpu_count() or 1)))
+        
+        fixed_params = {}
+        lag_col = f"Lag1_{st.session_state.target}"
+        if model_name == "Persistence" and lag_col in st.session_state.features:
+            fixed_params = {"lag_index": st.session_state.features.index(lag_col)}
+        
+        # Fitted models are reused for the same model, search, features and split
+        cache_key = artifact_key(
+            model_name, fixed_params, st.session_state.features,
+            st.session_state.split_version, search_mode, n_iter
+        )
         
         if st.button("Train Model"):
-            model = LinearRegression()
-            model.fit(st.session_state.X_train, st.session_state.y_train)
-            
-            st.session_state.model = model
-            st.success("Model trained successfully!")
+            cached = get_model_cache().get(cache_key)
+            if cached is not None:
+                st.session_state.model = cached["model"]
+                st.session_state.model_key = cache_key
+                st.session_state.model_split = st.session_state.split_version
+                st.session_state.model_results = cached["results"]
+                st.session_state.search_job = None
+                st.success("Loaded previously trained model from cache!")
+            else:
+                train_rows = featured.rows(st.session_state.train_idx)
+                X_train = train_rows[st.session_state.features]
+                y_train = train_rows[st.session_state.target]
+                dates = train_rows['Date'] if 'Date' in train_rows.columns else None
+                st.session_state.pending_split = st.session_state.split_version
+                st.session_state.search_job = SearchJob(
+                    model_name, param_candidates(model_name, search_mode, n_iter),
+                    X_train, y_train, dates=dates, fixed_params=fixed_params,
+                    n_jobs=n_jobs, cache=get_model_cache(), cache_key=cache_key
+                ).start()
+        
+        show_training_progress()
+        
+        if st.session_state.model is not None:
+            model = st.session_state.model
+            if st.session_state.model_results is not None:
+                st.write("Search results (walk-forward MSE on the training set):")
+                st.dataframe(st.session_state.model_results)
             
-            # Show model coefficients
-            coeff_df = pd.DataFrame({
-                'Feature': st.session_state.features,
-                'Coefficient': model.coef_
-            })
+            # Show model coefficients or importances
+            weight_name, weights = feature_weights(model, st.session_state.features)
+            if weights is not None:
+                coeff_df = pd.DataFrame({
+                    'Feature': st.session_state.features,
+                    weight_name: weights
+                })
+                
+                st.write(f"Model {weight_name.lower()}s:")
+                st.dataframe(coeff_df)
+                
+                # Visualize coefficients
+                fig = px.bar(coeff_df, x='Feature', y=weight_name, 
+                             title=f'Feature {weight_name}s')
+                st.plotly_chart(fig)
             
-            st.write("Model coefficients:")
-            st.dataframe(coeff_df)
+            # Registered models keep their feature spec and dataset version for serving
+            if featured.meta.get("specs"):
+                registry_name = st.text_input("Registry name:", model_name)
+                if st.button("Register Model"):
+                    model_id = get_model_registry().register(
+                        model, registry_name, featured.meta["specs"], st.session_state.features,
+                        st.session_state.target, featured.version,
+                        close_col=featured.meta["close_col"], params=model.get_params(),
+                    )
+                    st.success(f"Registered {registry_name} as {model_id}.")
+        
+        # Online mode: append new daily bars and update features and model in place
+        if st.session_state.tickers and featured.meta.get("specs"):
+            st.subheader("Incremental Updates")
+            forgetting = st.slider("Forgetting factor:", 0.95, 1.0, 1.0, step=0.001, format="%.3f",
+                                   help="Weight of each older bar relative to the next one; 1.0 keeps all history equally.")
+            if st.button("Start Online Model"):
+                processed = snapshot("preprocessed")
+                st.session_state.online = OnlinePipeline(
+                    featured.meta["specs"], st.session_state.target,
+                    featured.meta["close_col"], forgetting=forgetting
+                ).prime(processed.frame)
+                st.success("Online model primed on the preprocessed history!")
             
-            # Visualize coefficients
-            fig = px.bar(coeff_df, x='Feature', y='Coefficient', 
-                         title='Feature Coefficients')
-            st.plotly_chart(fig)
+            online = st.session_state.online
+            if online is not None:
+                last_date = max(online.last_date.values())
+                st.write(f"Online model is current up to {pd.Timestamp(last_date):%Y-%m-%d}.")
+                if st.button("Fetch New Bars and Update"):
+                    start = pd.Timestamp(last_date) + pd.Timedelta(days=1)
+                    # Today's bar is still forming; fold in completed sessions only
+                    end = completed_end()
+                    if start >= end:
+                        st.info("No new trading days to fetch yet.")
+                    else:
+                        frames = get_price_store().get_many(st.session_state.tickers, start, end)
+                        if st.session_state.ticker is not None:
+                            bars = frames[st.session_state.ticker.upper()].reset_index()
+                        else:
+                            bars = build_panel(frames).reset_index().drop(columns='Return')
+                        updates = online.append(bars)
+                        if updates.empty:
+                            st.info("No new bars available yet.")
+                        else:
+                            st.metric("Update time", f"{online.last_update_seconds * 1e3:.2f} ms")
+                            st.write(f"Appended {len(updates)} bars. Predictions made before each update:")
+                            st.dataframe(updates)
+                            weights = pd.DataFrame({'Feature': online.columns, 'Coefficient': online.model.coef_})
+                            st.dataframe(weights)
     else:
         st.warning("Please complete train/test split first.")
 
 with tab6:
     st.header("Model Evaluation")
-    if st.session_state.model is not None:
-        y_pred = st.session_state.model.predict(st.session_state.X_test)
+    featured = snapshot("featured")
+    current = (
+        st.session_state.model is not None and featured is not None
+        and st.session_state.split_version is not None
+        and st.session_state.model_split == st.session_state.split_version
+    )
+    if current:
+        test_rows = featured.rows(st.session_state.test_idx)
+        y_test = test_rows[st.session_state.target]
         
-        mse = mean_squared_error(st.session_state.y_test, y_pred)
-        r2 = r2_score(st.session_state.y_test, y_pred)
+        # Predictions are recomputed only when the model or the split changes
+        cached = st.session_state.predictions
+        if cached is None or cached[0] is not st.session_state.model or cached[1] != st.session_state.split_version:
+            with stage(st.session_state.profiler, "predict", len(test_rows)):
+                y_pred = st.session_state.model.predict(test_rows[st.session_state.features])
+            st.session_state.predictions = (st.session_state.model, st.session_state.split_version, y_pred)
+        y_pred = st.session_state.predictions[2]
+        
+        scores = evaluate(y_test, y_pred)
+        mse, r2 = scores["MSE"], scores["R2"]
         
         col1, col2 = st.columns(2)
         with col1:
@@ -326,42 +792,175 @@ with tab6:
         with col2:
             st.metric("R² Score", f"{r2:.4f}")
         
-        # Actual vs Predicted plot
-        fig1 = px.scatter(
-            x=st.session_state.y_test,
-            y=y_pred,
-            labels={'x': 'Actual', 'y': 'Predicted'},
-            title="Actual vs Predicted Values"
-        )
+        # Actual vs Predicted plot, binned server-side when there are too many points
+        plot_key = (st.session_state.split_version, st.session_state.model_key)
+        if len(y_test) > SCATTER_BIN_THRESHOLD:
+            with stage(st.session_state.profiler, "chart_prep", len(y_test)):
+                counts, x_centers, y_centers = binned_scatter(plot_key, y_test.to_numpy(), y_pred, 100)
+            fig1 = go.Figure(go.Heatmap(
+                x=x_centers, y=y_centers, z=np.where(counts > 0, counts, np.nan),
+                colorscale='Viridis', colorbar=dict(title='Count')
+            ))
+            fig1.update_layout(title="Actual vs Predicted Values", xaxis_title='Actual', yaxis_title='Predicted')
+        else:
+            fig1 = px.scatter(
+                x=y_test,
+                y=y_pred,
+                labels={'x': 'Actual', 'y': 'Predicted'},
+                title="Actual vs Predicted Values"
+            )
         fig1.add_shape(
             type="line", line=dict(dash='dash'),
-            x0=min(st.session_state.y_test),
-            y0=min(st.session_state.y_test),
-            x1=max(st.session_state.y_test),
-            y1=max(st.session_state.y_test)
+            x0=y_test.min(),
+            y0=y_test.min(),
+            x1=y_test.max(),
+            y1=y_test.max()
         )
         st.plotly_chart(fig1)
         
         # Time series plot for time-based data
-        if 'Date' in st.session_state.df.columns:
-            test_indices = st.session_state.X_test.index
-            plot_df = st.session_state.df.loc[test_indices]
+        if 'Date' in test_rows.columns:
+            plot_mask = np.ones(len(test_rows), dtype=bool)
+            if TICKER_COL in test_rows.columns:
+                plot_ticker = st.selectbox("Ticker to plot:", list(test_rows[TICKER_COL].unique()))
+                plot_mask = (test_rows[TICKER_COL] == plot_ticker).to_numpy()
+                plot_key = plot_key + (plot_ticker,)
+            dates = test_rows['Date'].to_numpy()[plot_mask]
+            window = zoom_window(dates, key="zoom_evaluation")
+            max_points = points_for_width(st.session_state.chart_width)
+            with stage(st.session_state.profiler, "chart_prep", 2 * len(dates)):
+                actual_x, actual_y = reduced_xy(plot_key + ('actual',), dates, y_test.to_numpy()[plot_mask], window, max_points)
+                pred_x, pred_y = reduced_xy(plot_key + ('predicted',), dates, y_pred[plot_mask], window, max_points)
             
             fig2 = px.line(
-                x=plot_df['Date'],
-                y=st.session_state.y_test,
+                x=actual_x,
+                y=actual_y,
                 title="Actual vs Predicted Over Time",
                 labels={'x': 'Date', 'y': st.session_state.target}
             )
             fig2.add_scatter(
-                x=plot_df['Date'],
-                y=y_pred,
+                x=pred_x,
+                y=pred_y,
                 name='Predicted',
                 line=dict(color='red')
             )
             st.plotly_chart(fig2)
-    else:
+        
+        # Trade the predicted returns: positions per date across every ticker
+        if st.session_state.target == 'Return' and 'Date' in test_rows.columns:
+            st.subheader("Strategy Backtest")
+            st.caption(
+                "Each prediction is the model's estimate of its own row's target, and features such as "
+                "moving averages include that date's close. So the prediction for date t is known only at "
+                "t's close, and a position built from it first earns the return of date t + delay. "
+                "A model fitted to same-day returns is therefore traded as a next-day forecast."
+            )
+            if st.session_state.target != 'Return':
+                st.warning(f"The target is {st.session_state.target}, not Return: the position rules treat "
+                           "predictions as returns, so these results are not meaningful.")
+            dates, tickers, matrices = to_matrices(test_rows.assign(Predicted=y_pred), ['Predicted', 'Return'])
+            # Ranking needs at least two names per date
+            rules = ("threshold", "rank", "vol_scaled") if len(tickers) > 1 else ("threshold", "vol_scaled")
+            grid = [spec for spec in DEFAULT_GRID if len(tickers) > 1 or spec["rule"] != ["rank"]]
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                rule = st.selectbox(
+                    "Position rule:", rules,
+                    format_func={"threshold": "Threshold", "rank": "Rank long-short",
+                                 "vol_scaled": "Volatility-scaled"}.get
+                )
+            with col2:
+                cost_bps = st.number_input("Transaction cost (bps):", 0.0, 100.0, 10.0, step=1.0)
+            with col3:
+                delay = st.number_input("Execution delay (dates):", 1, 5, 1,
+                                        help="A prediction made on date t first earns the return of date t + delay.")
+            params = {}
+            if rule == "threshold":
+                params["threshold"] = st.number_input("Threshold:", 0.0, 0.1, 0.0, step=0.0005, format="%.4f")
+                params["long_only"] = st.checkbox("Long only", value=False)
+            elif rule == "rank":
+                params["quantile"] = st.slider("Long/short quantile:", 0.05, 0.5, 0.2)
+            else:
+                params["target_vol"] = st.slider("Target annual volatility:", 0.01, 0.5, 0.1)
+                params["max_leverage"] = st.slider("Max gross leverage:", 0.5, 5.0, 1.0)
+                params["vol_window"] = st.slider("Volatility window (dates):", 5, 120, 20)
+            
+            with stage(st.session_state.profiler, "backtest", matrices['Return'].size):
+                curve, metrics = backtest(matrices['Predicted'], matrices['Return'], rule,
+                                          cost_bps=cost_bps, delay=int(delay), dates=dates, **params)
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Sharpe", f"{metrics['Sharpe']:.2f}")
+            with col2:
+                st.metric("Total Return", f"{metrics['Total Return']:.2%}")
+            with col3:
+                st.metric("Max Drawdown", f"{metrics['Max Drawdown']:.2%}")
+            with col4:
+                st.metric("Mean Turnover", f"{metrics['Mean Turnover']:.2f}",
+                          help=f"Costs {metrics['Annual Costs']:.2%} per year")
+            
+            fig4 = px.line(curve.reset_index(), x='Date', y=['Equity', 'Gross Equity'],
+                           title="Equity Curve (net and before costs)")
+            st.plotly_chart(fig4)
+            
+            with st.expander("Parameter sweep"):
+                n_grid = sum(int(np.prod([len(v) for v in spec.values()])) for spec in grid)
+                sweep_jobs = int(st.number_input("Sweep workers:", 1, 64, os.cpu_count() or 1))
+                if st.button(f"Run Sweep ({n_grid} combinations)"):
+                    with st.spinner("Sweeping position rules..."), \
+                            stage(st.session_state.profiler, "backtest_sweep", n_grid):
+                        results = sweep(matrices['Predicted'], matrices['Return'], grid, n_jobs=sweep_jobs)
+                    st.dataframe(results.head(50))
+    elif st.session_state.model is not None and st.session_state.walk_forward is None:
+        st.warning("The model was trained on an older split. Please retrain it in the Model Training tab.")
+    elif st.session_state.walk_forward is None:
         st.warning("Please train the model first.")
+    
+    if st.session_state.walk_forward is not None:
+        folds, summary, _ = st.session_state.walk_forward
+        st.subheader("Walk-Forward Backtest")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Mean MSE", f"{summary['Mean MSE']:.6f}", help=f"Std {summary['Std MSE']:.6f}")
+        with col2:
+            st.metric("Mean R²", f"{summary['Mean R2']:.4f}", help=f"Std {summary['Std R2']:.4f}")
+        with col3:
+            st.metric("Out-of-sample MSE", f"{summary['Out-of-sample MSE']:.6f}")
+        with col4:
+            st.metric("Out-of-sample R²", f"{summary['Out-of-sample R2']:.4f}")
+        
+        st.write("Per-fold results:")
+        st.dataframe(folds)
+        
+        fig3 = px.bar(
+            folds, x='Fold', y=['Fit Seconds', 'Predict Seconds'],
+            title=f"Time per Fold (total {summary['Total Seconds']:.2f}s)",
+            labels={'value': 'Seconds'}
+        )
+        st.plotly_chart(fig3)
+
+# Optional timing panel, drawn last so it includes every stage of this run
+with st.sidebar:
+    if st.checkbox("Show stage timings (debug)", key="debug_timings"):
+        profiler = st.session_state.profiler
+        st.dataframe(profiler.frame(), hide_index=True)
+        caches = {
+            "price_store": get_price_store().stats(),
+            "feature_engine": get_feature_engine().stats(),
+        }
+        st.caption(
+            f"Feature cache: {caches['feature_engine']['hits']} hits, "
+            f"{caches['feature_engine']['misses']} misses, "
+            f"{caches['feature_engine']['incremental']} incremental"
+        )
+        st.download_button(
+            "Download Timings JSON", profiler.to_json(caches=caches),
+            file_name="financeapp_timings.json", mime="application/json"
+        )
+        if st.button("Reset Timings"):
+            profiler.reset()
+            st.rerun()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,5 @@
+import sys
+
+from financeapp.cli import main
+
+sys.exit(main())
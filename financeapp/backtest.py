@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import ParameterGrid
+
+from financeapp.panel import DATE_COL, TICKER_COL
+from financeapp.validation import parallel_map
+
+PERIODS_PER_YEAR = 252
+
+DEFAULT_GRID = [
+    {"rule": ["threshold"], "threshold": [0.0, 0.0005, 0.001, 0.002, 0.005],
+     "long_only": [False, True], "cost_bps": [0, 5, 10, 25], "delay": [1, 2]},
+    {"rule": ["rank"], "quantile": [0.1, 0.2, 0.3, 0.5],
+     "cost_bps": [0, 5, 10, 25], "delay": [1, 2]},
+    {"rule": ["vol_scaled"], "target_vol": [0.05, 0.1, 0.2], "max_leverage": [1.0, 2.0],
+     "vol_window": [10, 20, 60], "cost_bps": [0, 5, 10, 25], "delay": [1, 2]},
+]
+
+
+def to_matrices(df, columns):
+    """Pivot a long frame into ``(dates, tickers, {column: dates x tickers})``.
+
+    Frames without a Ticker column become a single column. Missing
+    (date, ticker) cells are NaN.
+    """
+    dates, date_pos = np.unique(df[DATE_COL].to_numpy(), return_inverse=True)
+    if TICKER_COL in df.columns:
+        tickers, ticker_pos = np.unique(df[TICKER_COL].astype(str).to_numpy(), return_inverse=True)
+    else:
+        tickers, ticker_pos = np.array([None]), np.zeros(len(df), dtype=np.intp)
+    matrices = {}
+    for column in columns:
+        matrix = np.full((len(dates), len(tickers)), np.nan)
+        matrix[date_pos, ticker_pos] = df[column].to_numpy(dtype=np.float64)
+        matrices[column] = matrix
+    return dates, tickers, matrices
+
+
+# Trailing volatility known before each date (the current return is excluded)
+def realized_vol(returns, window=20):
+    vol = pd.DataFrame(returns).rolling(window, min_periods=max(2, window // 2)).std()
+    return vol.shift(1).to_numpy()
+
+
+def _normalize(weights):
+    gross = np.abs(weights).sum(axis=1, keepdims=True)
+    return np.divide(weights, gross, out=np.zeros_like(weights), where=gross > 0)
+
+
+def threshold_positions(pred, threshold=0.0, long_only=False):
+    """Long where the prediction beats ``threshold``, short below ``-threshold``.
+
+    Positions are equal-weight with unit gross exposure on every date.
+    """
+    with np.errstate(invalid="ignore"):
+        weights = (pred > threshold).astype(np.float64)
+        if not long_only:
+            weights -= pred < -threshold
+    return _normalize(weights)
+
+
+# Each date's 0-based ranks; NaNs sort last, so ranks below n_valid are real predictions
+def cross_sectional_ranks(pred):
+    valid = ~np.isnan(pred)
+    return np.argsort(np.argsort(np.where(valid, pred, np.inf), axis=1, kind="stable"), axis=1)
+
+
+def rank_positions(pred, quantile=0.2, ranks=None):
+    """Dollar-neutral long top / short bottom ``quantile`` of each date's ranks.
+
+    Each side holds at least one name on dates with two or more
+    predictions, so small universes are not left flat. ``ranks`` (from
+    ``cross_sectional_ranks``) can be passed in when many quantiles are
+    tried on the same predictions.
+    """
+    valid = ~np.isnan(pred)
+    n_valid = valid.sum(axis=1, keepdims=True)
+    if ranks is None:
+        ranks = cross_sectional_ranks(pred)
+    k = np.maximum(np.floor(n_valid * quantile), 1)
+    k = np.where(2 * k > n_valid, n_valid // 2, k)
+    long = valid & (ranks >= n_valid - k)
+    short = valid & (ranks < k)
+    weights = long.astype(np.float64) - short
+    return np.divide(weights, 2 * k, out=np.zeros_like(weights), where=k > 0)
+
+
+def vol_scaled_positions(pred, vol, target_vol=0.1, max_leverage=1.0,
+                         periods_per_year=PERIODS_PER_YEAR):
+    """Trade the prediction's sign, sized so each ticker targets ``target_vol``.
+
+    Each of the date's tickers gets an equal share of the annualised
+    volatility target; dates whose gross exposure would exceed
+    ``max_leverage`` are scaled down.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valid = ~np.isnan(pred) & (vol > 0)
+        n_valid = valid.sum(axis=1, keepdims=True)
+        per_period = target_vol / np.sqrt(periods_per_year)
+        weights = np.where(valid, np.sign(pred) * per_period / vol, 0.0)
+    weights = np.divide(weights, n_valid, out=np.zeros_like(weights), where=n_valid > 0)
+    gross = np.abs(weights).sum(axis=1, keepdims=True)
+    scale = np.minimum(1.0, np.divide(max_leverage, gross, out=np.ones_like(gross), where=gross > 0))
+    return weights * scale
+
+
+def positions(rule, pred, returns=None, vol=None, periods_per_year=PERIODS_PER_YEAR, **params):
+    if rule == "threshold":
+        return threshold_positions(pred, **params)
+    if rule == "rank":
+        return rank_positions(pred, **params)
+    if rule == "vol_scaled":
+        window = params.pop("vol_window", 20)
+        if vol is None:
+            vol = realized_vol(returns, window)
+        return vol_scaled_positions(pred, vol, periods_per_year=periods_per_year, **params)
+    raise ValueError(f"Unknown position rule: {rule}")
+
+
+def simulate(weights, returns, cost_bps=0.0, delay=1):
+    """Per-date gross return, costs, net return and turnover of a weight matrix.
+
+    Weights built from the prediction made on date t are held from date
+    t + ``delay``, so by default they earn the next date's return; ``delay``
+    must be at least 1 because date t's return is already realised when its
+    prediction is made. Costs are charged on turnover at ``cost_bps`` basis
+    points per unit traded.
+    """
+    if delay < 1:
+        raise ValueError(f"delay must be at least 1 date, got {delay}")
+    weights = np.vstack([np.zeros((min(delay, len(weights)), weights.shape[1])), weights[:-delay]])
+    gross = np.nansum(weights * np.nan_to_num(returns), axis=1)
+    turnover = np.abs(np.diff(weights, axis=0, prepend=0.0)).sum(axis=1)
+    costs = turnover * cost_bps / 1e4
+    return gross, costs, gross - costs, turnover
+
+
+def summarize(net, turnover, costs=None, periods_per_year=PERIODS_PER_YEAR):
+    equity = np.cumprod(1.0 + net)
+    drawdown = equity / np.maximum.accumulate(np.maximum(equity, 1.0)) - 1.0
+    std = net.std(ddof=1) if len(net) > 1 else np.nan
+    years = len(net) / periods_per_year
+    return {
+        "Total Return": equity[-1] - 1.0 if len(net) else 0.0,
+        "Annual Return": equity[-1] ** (1.0 / years) - 1.0 if len(net) and equity[-1] > 0 else np.nan,
+        "Annual Volatility": std * np.sqrt(periods_per_year),
+        "Sharpe": net.mean() / std * np.sqrt(periods_per_year) if std > 0 else np.nan,
+        "Max Drawdown": drawdown.min() if len(net) else 0.0,
+        "Mean Turnover": turnover.mean() if len(net) else 0.0,
+        "Annual Costs": costs.mean() * periods_per_year if costs is not None and len(net) else 0.0,
+        "Hit Rate": (net > 0).sum() / max(1, (net != 0).sum()),
+    }
+
+
+def backtest(pred, returns, rule="threshold", cost_bps=10.0, delay=1, dates=None,
+             periods_per_year=PERIODS_PER_YEAR, **params):
+    """Turn (date x ticker) predicted returns into a strategy.
+
+    Returns ``(curve, metrics)``: one row per date with gross, cost, net and
+    equity columns, and the summary metrics of the net returns.
+    """
+    weights = positions(rule, pred, returns, periods_per_year=periods_per_year, **params)
+    gross, costs, net, turnover = simulate(weights, returns, cost_bps, delay)
+    equity = np.cumprod(1.0 + net)
+    curve = pd.DataFrame({
+        "Gross Return": gross,
+        "Costs": costs,
+        "Net Return": net,
+        "Turnover": turnover,
+        "Equity": equity,
+        "Gross Equity": np.cumprod(1.0 + gross),
+        "Drawdown": equity / np.maximum.accumulate(np.maximum(equity, 1.0)) - 1.0,
+    }, index=pd.Index(dates if dates is not None else np.arange(len(net)), name=DATE_COL))
+    return curve, summarize(net, turnover, costs, periods_per_year)
+
+
+# Worker state for sweeps: matrices are sent once per process, not per task
+_SWEEP = {}
+
+
+def _init_sweep(pred, returns, periods_per_year):
+    _SWEEP.clear()
+    _SWEEP.update(pred=pred, returns=returns, periods_per_year=periods_per_year, vol={}, ranks=None)
+
+
+def _run_candidates(candidates):
+    pred, returns = _SWEEP["pred"], _SWEEP["returns"]
+    periods_per_year = _SWEEP["periods_per_year"]
+    records = []
+    for candidate in candidates:
+        params = dict(candidate)
+        rule = params.pop("rule")
+        cost_bps = params.pop("cost_bps", 0.0)
+        delay = params.pop("delay", 1)
+        vol = None
+        if rule == "rank":
+            if _SWEEP["ranks"] is None:
+                _SWEEP["ranks"] = cross_sectional_ranks(pred)
+            params["ranks"] = _SWEEP["ranks"]
+        elif rule == "vol_scaled":
+            window = params.get("vol_window", 20)
+            vol = _SWEEP["vol"].get(window)
+            if vol is None:
+                vol = _SWEEP["vol"][window] = realized_vol(returns, window)
+        weights = positions(rule, pred, returns, vol, periods_per_year, **params)
+        gross, costs, net, turnover = simulate(weights, returns, cost_bps, delay)
+        records.append(dict(candidate, **summarize(net, turnover, costs, periods_per_year)))
+    return records
+
+
+def sweep(pred, returns, grid=DEFAULT_GRID, n_jobs=1, periods_per_year=PERIODS_PER_YEAR,
+          chunk_size=64):
+    """Backtest every combination of ``grid`` (a ParameterGrid spec).
+
+    Each combination needs a ``rule`` and may set ``cost_bps``, ``delay``
+    and the rule's own parameters. Chunks of ``chunk_size`` combinations
+    are spread over ``n_jobs`` processes. Returns one row per combination, best Sharpe first.
+    """
+    candidates = list(ParameterGrid(grid))
+    chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+    results = parallel_map(_run_candidates, [(chunk,) for chunk in chunks], n_jobs,
+                           initializer=_init_sweep, initargs=(pred, returns, periods_per_year))
+    _SWEEP.clear()
+
+    frame = pd.DataFrame([record for chunk in results for record in chunk])
+    return frame.sort_values("Sharpe", ascending=False, na_position="last").reset_index(drop=True)
@@ -0,0 +1,137 @@
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from financeapp.charts import bin2d, downsample, ohlc_rule, points_for_width, resample_ohlc
+from financeapp.panel import TICKER_COL
+from financeapp.pipeline import DEFAULT_FEATURES, load_prices, run_pipeline
+from financeapp.price_store import FrameProvider, PriceStore
+from financeapp.profiling import Profiler
+
+DEFAULT_ROWS = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_TICKERS = (1, 10, 100)
+FULL_ROWS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+FULL_TICKERS = (1, 10, 100, 1_000)
+STAGES = ("load", "preprocess", "features", "split", "train", "predict", "chart_prep")
+
+SYNTHETIC_START = "1680-01-01"
+# Each ticker needs enough bars for the slowest indicator to warm up, and the
+# price cache keeps daily bars, so one ticker's history must fit in pandas'
+# 1677-2262 timestamp range
+MIN_ROWS_PER_TICKER = 100
+MAX_ROWS_PER_TICKER = 150_000
+
+
+def synthetic_prices(n_rows, n_tickers, seed=0):
+    """``{ticker: bars}`` of geometric random walks, ``n_rows`` bars in total."""
+    per_ticker = n_rows // n_tickers
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(SYNTHETIC_START, periods=per_ticker, name="Date")
+    returns = rng.normal(0.0002, 0.01, size=(n_tickers, per_ticker))
+    close = 100.0 * np.exp(np.cumsum(returns, axis=1))
+    spread = np.abs(rng.normal(0, 0.005, size=close.shape))
+    volume = rng.integers(100_000, 10_000_000, size=close.shape).astype(np.float64)
+    width = len(str(n_tickers - 1))
+    return {
+        f"T{i:0{width}d}": pd.DataFrame({
+            "Open": close[i] * (1 + rng.normal(0, 0.002, per_ticker)),
+            "High": close[i] * (1 + spread[i]),
+            "Low": close[i] * (1 - spread[i]),
+            "Close": close[i],
+            "Volume": volume[i],
+        }, index=dates)
+        for i in range(n_tickers)
+    }
+
+
+def _chart_prep(prices, predictions, target, width=1200):
+    max_points = points_for_width(width)
+    for _, group in prices.groupby(TICKER_COL, observed=True):
+        downsample(group["Date"].to_numpy(), group["Close"].to_numpy(), max_points)
+    first = prices[prices[TICKER_COL] == prices[TICKER_COL].iloc[0]]
+    resample_ohlc(first, ohlc_rule(first["Date"].min(), first["Date"].max(), width // 4))
+    bin2d(predictions[target].to_numpy(), predictions["Predicted"].to_numpy())
+
+
+def _run_case(frames, labels, model, profiler):
+    tickers = list(frames)
+    end = frames[tickers[0]].index[-1] + pd.Timedelta(days=1)
+    with tempfile.TemporaryDirectory() as root:
+        store = PriceStore(root, provider=FrameProvider(frames), max_bytes=float("inf"))
+        prices = load_prices(tickers, SYNTHETIC_START, end, store=store, profiler=profiler)
+    result = run_pipeline(prices, labels, model=model, profiler=profiler)
+    with profiler.stage("chart_prep", len(prices)):
+        _chart_prep(prices, result["predictions"], "Return")
+
+
+def benchmark_case(n_rows, n_tickers, labels=DEFAULT_FEATURES, model="Linear Regression",
+                   repeat=1, trace_memory=True, seed=0):
+    """Time every pipeline stage on one synthetic dataset.
+
+    Timings are the best of ``repeat`` runs. Peak memory comes from an
+    extra run under tracemalloc, so tracing does not distort the timings.
+    Returns one row per stage.
+    """
+    frames = synthetic_prices(n_rows, n_tickers, seed)
+    runs = []
+    for _ in range(repeat):
+        profiler = Profiler()
+        _run_case(frames, labels, model, profiler)
+        runs.append(profiler.stages)
+    peaks = {}
+    if trace_memory:
+        profiler = Profiler(trace_memory=True)
+        _run_case(frames, labels, model, profiler)
+        peaks = {name: entry["peak_bytes"] for name, entry in profiler.stages.items()}
+
+    rows = []
+    for name in STAGES:
+        seconds = min(run[name]["seconds"] for run in runs)
+        stage_rows = runs[0][name]["rows"]
+        rows.append({
+            "Rows": n_rows,
+            "Tickers": n_tickers,
+            "Stage": name,
+            "Stage Rows": stage_rows,
+            "Seconds": seconds,
+            "Rows/s": stage_rows / seconds if seconds else np.nan,
+            "Peak MB": peaks[name] / 1e6 if peaks.get(name) is not None else np.nan,
+        })
+    return rows
+
+
+def run_benchmark(rows=DEFAULT_ROWS, tickers=DEFAULT_TICKERS, labels=DEFAULT_FEATURES,
+                  model="Linear Regression", repeat=1, trace_memory=True, seed=0, progress=None):
+    """Benchmark every (rows, tickers) combination; returns ``(results, skipped)``.
+
+    Combinations where a ticker would get fewer than ``MIN_ROWS_PER_TICKER``
+    or more than ``MAX_ROWS_PER_TICKER`` daily bars are skipped and listed.
+    """
+    results, skipped = [], []
+    for n_rows in rows:
+        for n_tickers in tickers:
+            per_ticker = n_rows // n_tickers
+            if not MIN_ROWS_PER_TICKER <= per_ticker <= MAX_ROWS_PER_TICKER:
+                skipped.append({"Rows": n_rows, "Tickers": n_tickers})
+                continue
+            started = time.perf_counter()
+            results.extend(benchmark_case(n_rows, n_tickers, labels, model, repeat, trace_memory, seed))
+            if progress is not None:
+                progress(n_rows, n_tickers, time.perf_counter() - started)
+    return pd.DataFrame(results), skipped
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+    }
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# Approximate bar lengths used to pick a resampling rule for a date span
+OHLC_RULES = [
+    ("min", pd.Timedelta(minutes=1)),
+    ("5min", pd.Timedelta(minutes=5)),
+    ("15min", pd.Timedelta(minutes=15)),
+    ("h", pd.Timedelta(hours=1)),
+    ("D", pd.Timedelta(days=1)),
+    ("W", pd.Timedelta(days=7)),
+    ("ME", pd.Timedelta(days=30.44)),
+    ("QE", pd.Timedelta(days=91.31)),
+    ("YE", pd.Timedelta(days=365.25)),
+]
+
+
+def _numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def points_for_width(width_px):
+    # Two points per pixel column keeps the extremes of every column visible
+    return max(3, int(width_px) * 2)
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of ``n_out`` representative points."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xs, ys = _numeric(x), np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x = xs[next_lo:next_hi].mean()
+        avg_y = ys[next_lo:next_hi].mean()
+        seg_x, seg_y = xs[lo:hi], ys[lo:hi]
+        area = np.abs((xs[a] - avg_x) * (seg_y - ys[a]) - (xs[a] - seg_x) * (avg_y - ys[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """Indices of the minimum and maximum of ``n_out // 2`` equal-count buckets."""
+    n = len(y)
+    n_buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+    bucket = np.arange(n) * n_buckets // n
+    order = np.lexsort((np.asarray(y), bucket))
+    starts = np.searchsorted(bucket[order], np.arange(n_buckets))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate((order[starts], order[ends])))
+
+
+def downsample(x, y, max_points, method="lttb"):
+    """Return ``(x, y)`` reduced to at most ``max_points`` points, NaNs dropped."""
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    keep = ~np.isnan(y)
+    x, y = x[keep], y[keep]
+    if method == "lttb":
+        idx = lttb_indices(x, y, max_points)
+    elif method == "minmax":
+        idx = minmax_indices(y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return x[idx], y[idx]
+
+
+def window_mask(x, start=None, end=None):
+    x = np.asarray(x)
+    mask = np.ones(len(x), dtype=bool)
+    if start is not None:
+        mask &= x >= np.asarray(start, dtype=x.dtype)
+    if end is not None:
+        mask &= x <= np.asarray(end, dtype=x.dtype)
+    return mask
+
+
+# Finest rule that keeps the span within max_bars bars
+def ohlc_rule(start, end, max_bars):
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for rule, length in OHLC_RULES:
+        if span / length <= max_bars:
+            return rule
+    return OHLC_RULES[-1][0]
+
+
+def resample_ohlc(frame, rule, date_col="Date"):
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    agg = {c: how for c, how in agg.items() if c in frame.columns}
+    bars = frame.set_index(date_col)[list(agg)].resample(rule).agg(agg)
+    return bars.dropna(subset=[c for c in ("Close",) if c in bars.columns]).reset_index()
+
+
+def bin2d(x, y, bins=100):
+    """2D histogram of a point cloud: ``(counts, x_centers, y_centers)``."""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    counts, x_edges, y_edges = np.histogram2d(x[keep], y[keep], bins=bins)
+    return counts.T, (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2
@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+from financeapp import benchmark, serving
+from financeapp.features import FEATURE_SPECS
+from financeapp.models import MODELS
+from financeapp.panel import parse_tickers
+from financeapp.pipeline import DEFAULT_FEATURES, load_prices, resolve_features, run_universe
+from financeapp.price_store import DEFAULT_CACHE_DIR, PriceStore
+from financeapp.registry import DEFAULT_REGISTRY_DIR, ModelRegistry
+
+
+def _tickers(values):
+    tickers = []
+    for value in values:
+        if value.startswith("@"):
+            with open(value[1:]) as fh:
+                tickers.extend(parse_tickers(fh.read()))
+        else:
+            tickers.extend(parse_tickers(value))
+    return list(dict.fromkeys(tickers))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="financeapp", description="Financial ML pipeline without the UI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Fetch prices, build features, fit and score models.")
+    run.add_argument("--tickers", nargs="+", required=True,
+                     help="Ticker symbols, comma or space separated; @file reads them from a file.")
+    run.add_argument("--start", default="2020-01-01", help="First date (inclusive), YYYY-MM-DD.")
+    run.add_argument("--end", default=date.today().isoformat(), help="Last date (exclusive), YYYY-MM-DD.")
+    run.add_argument("--features", nargs="+", default=DEFAULT_FEATURES,
+                     help="Feature names; see 'financeapp features'.")
+    run.add_argument("--target", default="Return", help="Target column (default: Return).")
+    run.add_argument("--model", default="Linear Regression", choices=list(MODELS))
+    run.add_argument("--params", default=None, help="Model parameters as a JSON object.")
+    run.add_argument("--test-size", type=float, default=0.3, help="Fraction of the latest dates held out.")
+    run.add_argument("--walk-forward", type=int, default=None, metavar="N",
+                     help="Also backtest walk-forward with N folds.")
+    run.add_argument("--pooled", action="store_true", help="Fit one model on all tickers instead of one each.")
+    run.add_argument("--jobs", type=int, default=-1, help="Worker processes for tickers (-1: all cores).")
+    run.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Price cache directory.")
+    run.add_argument("--out", default="financeapp-output", help="Directory for metrics and predictions.")
+
+    bench = commands.add_parser("bench", help="Time each pipeline stage on synthetic data.")
+    bench.add_argument("--rows", nargs="+", type=int, default=list(benchmark.DEFAULT_ROWS),
+                       help="Total rows per dataset.")
+    bench.add_argument("--tickers", nargs="+", type=int, default=list(benchmark.DEFAULT_TICKERS),
+                       help="Tickers per dataset.")
+    bench.add_argument("--full", action="store_true",
+                       help="Use the full grid: 1k to 10M rows and 1 to 1000 tickers.")
+    bench.add_argument("--features", nargs="+", default=DEFAULT_FEATURES)
+    bench.add_argument("--model", default="Linear Regression", choices=list(MODELS))
+    bench.add_argument("--repeat", type=int, default=1, help="Runs per dataset; the fastest is reported.")
+    bench.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run for peak memory.")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--out", default="benchmark.json", help="JSON report path; a .csv path writes a table.")
+
+    serve = commands.add_parser("serve", help="Serve registered models over HTTP.")
+    serve.add_argument("--host", default=serving.DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=serving.DEFAULT_PORT)
+    serve.add_argument("--registry-dir", default=DEFAULT_REGISTRY_DIR, help="Model registry directory.")
+    serve.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Price cache directory.")
+    serve.add_argument("--max-batch", type=int, default=serving.DEFAULT_MAX_BATCH,
+                       help="Most tickers predicted in one batch.")
+    serve.add_argument("--max-wait-ms", type=float, default=serving.DEFAULT_MAX_WAIT * 1e3,
+                       help="How long a batch waits for more requests.")
+    serve.add_argument("--max-models", type=int, default=serving.DEFAULT_MAX_MODELS,
+                       help="Models kept loaded in memory.")
+
+    models = commands.add_parser("models", help="List registered models.")
+    models.add_argument("--registry-dir", default=DEFAULT_REGISTRY_DIR, help="Model registry directory.")
+
+    commands.add_parser("features", help="List the available features.")
+    return parser
+
+
+def run(args):
+    started = time.perf_counter()
+    tickers = _tickers(args.tickers)
+    features = resolve_features(args.features)
+    params = json.loads(args.params) if args.params else None
+
+    prices = load_prices(tickers, args.start, args.end, store=PriceStore(args.cache_dir))
+    loaded = time.perf_counter()
+    metrics, predictions, errors = run_universe(
+        prices, per_ticker=not args.pooled, n_jobs=args.jobs,
+        labels=features, target=args.target, model=args.model, params=params,
+        test_size=args.test_size, n_splits=args.walk_forward,
+    )
+    finished = time.perf_counter()
+
+    os.makedirs(args.out, exist_ok=True)
+    metrics.to_csv(os.path.join(args.out, "metrics.csv"), index=False)
+    predictions.to_parquet(os.path.join(args.out, "predictions.parquet"), index=False)
+    missing = sorted(set(tickers) - set(prices["Ticker"].astype(str).unique())) if len(prices) else tickers
+    summary = {
+        "tickers": tickers,
+        "modelled": int(len(metrics)),
+        "missing": missing,
+        "errors": errors,
+        "features": features,
+        "target": args.target,
+        "model": args.model,
+        "params": params,
+        "load_seconds": loaded - started,
+        "model_seconds": finished - loaded,
+    }
+    with open(os.path.join(args.out, "run.json"), "w") as fh:
+        json.dump(summary, fh, indent=2, default=str)
+
+    print(f"Modelled {len(metrics)} of {len(tickers)} tickers in {finished - started:.1f}s; results in {args.out}")
+    for ticker, error in errors.items():
+        print(f"  {ticker}: {error}", file=sys.stderr)
+    return 0 if len(metrics) else 1
+
+
+def bench(args):
+    rows = benchmark.FULL_ROWS if args.full else args.rows
+    tickers = benchmark.FULL_TICKERS if args.full else args.tickers
+    features = resolve_features(args.features)
+
+    def progress(n_rows, n_tickers, seconds):
+        print(f"{n_rows:>12,} rows x {n_tickers:>5,} tickers: {seconds:.1f}s", file=sys.stderr)
+
+    results, skipped = benchmark.run_benchmark(
+        rows, tickers, features, args.model, repeat=args.repeat,
+        trace_memory=not args.no_memory, seed=args.seed, progress=progress,
+    )
+    if args.out.endswith(".csv"):
+        results.to_csv(args.out, index=False)
+    else:
+        report = {
+            "environment": benchmark.environment(),
+            "config": {"features": features, "model": args.model, "repeat": args.repeat, "seed": args.seed},
+            "results": results.to_dict(orient="records"),
+            "skipped": skipped,
+        }
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2, default=str)
+    if len(results):
+        print(results.pivot_table(index=["Rows", "Tickers"], columns="Stage", values="Seconds", sort=False)
+              .to_string(float_format="{:.3f}".format))
+    print(f"Wrote {len(results)} measurements to {args.out}")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "features":
+        for label in FEATURE_SPECS:
+            print(label)
+        return 0
+    if args.command == "bench":
+        return bench(args)
+    if args.command == "models":
+        print(ModelRegistry(args.registry_dir).list().to_string(index=False))
+        return 0
+    if args.command == "serve":
+        service = serving.PredictionService(
+            ModelRegistry(args.registry_dir), PriceStore(args.cache_dir), max_models=args.max_models,
+            max_batch=args.max_batch, max_wait=args.max_wait_ms / 1e3,
+        )
+        print(f"Serving predictions on http://{args.host}:{args.port}", file=sys.stderr)
+        serving.serve(service, args.host, args.port)
+        return 0
+    return run(args)
@@ -0,0 +1,182 @@
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+STAGES = ("raw", "preprocessed", "featured")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def content_hash(frame):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(c), str(t)) for c, t in frame.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# Steps are deterministic, so a derived version is named by what produced it
+def derive_version(parent, stage, params=None):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((parent, stage, sorted((params or {}).items()))).encode())
+    return digest.hexdigest()
+
+
+class Snapshot:
+    """One immutable version of a dataset at a pipeline stage.
+
+    ``frame`` must not be modified in place; steps derive a new frame and
+    store it as a new snapshot. Under pandas copy-on-write, columns a step
+    did not touch stay shared with the parent. Ingested files are attached
+    through ``loader`` and only read on first access to ``frame``; a frame
+    that can be loaded again may be dropped with ``unload``.
+    """
+
+    def __init__(self, version, stage, frame=None, loader=None, parent=None, meta=None):
+        self.version = version
+        self.stage = stage
+        self.parent = parent
+        self.meta = meta or {}
+        self._frame = frame
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._on_load = None
+
+    @property
+    def loaded(self):
+        return self._frame is not None
+
+    @property
+    def frame(self):
+        frame = self._frame
+        if frame is None:
+            loaded = False
+            with self._lock:
+                if self._frame is None:
+                    self._frame = self._loader()
+                    loaded = True
+                frame = self._frame
+            if loaded and self._on_load is not None:
+                self._on_load(self)
+        return frame
+
+    @property
+    def nbytes(self):
+        return int(self._frame.memory_usage(index=True).sum()) if self._frame is not None else 0
+
+    def unload(self, spill_dir=None):
+        """Drop the in-memory frame, first writing it to ``spill_dir`` if it has no loader.
+
+        Skipped while another thread is loading the frame.
+        """
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self._frame is None:
+                return
+            if self._loader is None:
+                if spill_dir is None:
+                    return
+                path = os.path.join(spill_dir, f"{self.version}.parquet")
+                self._frame.to_parquet(path)
+                self._loader = lambda: pd.read_parquet(path)
+            self._frame = None
+        finally:
+            self._lock.release()
+
+    def rows(self, positions, columns=None):
+        frame = self.frame if columns is None else self.frame[columns]
+        return frame.iloc[positions]
+
+
+class DatasetStore:
+    """Process-wide store of snapshots keyed by version hash.
+
+    Versions are never forgotten, so a version a session holds always
+    resolves. Their frames are kept in memory up to ``max_bytes``: beyond
+    that the least recently used are dropped, derived frames to be rebuilt
+    from their parent and the others after spilling to Parquet files under
+    ``spill_dir``.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_dir=None):
+        self.max_bytes = max_bytes
+        if spill_dir is None:
+            spill_dir = tempfile.mkdtemp(prefix="financeapp-snapshots-")
+            atexit.register(shutil.rmtree, spill_dir, True)
+        self.spill_dir = spill_dir
+        self._snapshots = {}
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version):
+        with self._lock:
+            snapshot = self._snapshots.get(version)
+            if snapshot is not None and version in self._loaded:
+                self._loaded.move_to_end(version)
+            return snapshot
+
+    def add(self, snapshot):
+        with self._lock:
+            existing = self._snapshots.get(snapshot.version)
+            if existing is not None:
+                return existing
+            self._snapshots[snapshot.version] = snapshot
+            snapshot._on_load = self._track
+        if snapshot.loaded:
+            self._track(snapshot)
+        return snapshot
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(self._loaded.values())
+
+    # Account for a frame now in memory and unload the oldest beyond the budget
+    def _track(self, snapshot):
+        with self._lock:
+            self._loaded[snapshot.version] = snapshot.nbytes
+            self._loaded.move_to_end(snapshot.version)
+            total = sum(self._loaded.values())
+            victims = []
+            for version, size in self._loaded.items():
+                if total <= self.max_bytes:
+                    break
+                if version != snapshot.version:
+                    victims.append(version)
+                    total -= size
+            for version in victims:
+                del self._loaded[version]
+        for version in victims:
+            self._snapshots[version].unload(self.spill_dir)
+
+    def put_raw(self, frame, meta=None):
+        return self.add(Snapshot(content_hash(frame), "raw", frame=frame, meta=meta))
+
+    def put_lazy(self, version, loader, meta=None):
+        return self.add(Snapshot(version, "raw", loader=loader, meta=meta))
+
+    def derive(self, parent, stage, params, build):
+        """Return the ``stage`` snapshot of ``parent`` for ``params``.
+
+        ``build(parent_frame)`` runs only if this version is not stored yet,
+        or again from the parent if its frame was unloaded; it returns the
+        new frame, or ``(frame, meta)``.
+        """
+        version = derive_version(parent.version, stage, params)
+        snapshot = self.get(version)
+        if snapshot is not None:
+            return snapshot, False
+        result = build(parent.frame)
+        frame, meta = result if isinstance(result, tuple) else (result, None)
+
+        def rebuild():
+            result = build(parent.frame)
+            return result[0] if isinstance(result, tuple) else result
+
+        snapshot = Snapshot(version, stage, frame=frame, loader=rebuild, parent=parent.version, meta=meta)
+        return self.add(snapshot), True
@@ -0,0 +1,110 @@
+import gzip
+import os
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_EXPORT_DIR = os.environ.get(
+    "FINANCEAPP_EXPORT_DIR",
+    os.path.join(os.path.expanduser("~"), ".financeapp", "exports"),
+)
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def frame_batches(frame, chunk_rows=DEFAULT_CHUNK_ROWS):
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def write_csv(batches, path, compress=False):
+    opener = gzip.open if compress else open
+    with opener(path, "wt", newline="") as fh:
+        for i, batch in enumerate(batches):
+            batch.to_csv(fh, header=i == 0, index=False)
+
+
+def write_parquet(batches, path):
+    writer = None
+    try:
+        for batch in batches:
+            table = pa.Table.from_pandas(batch, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+class ExportCache:
+    """Export files on disk, written once per (dataset version, format).
+
+    Files are produced chunk by chunk from an iterator of frames, so the
+    frame is never converted in one piece, and the oldest files are removed
+    once the directory exceeds ``max_bytes``. ``read`` returns the finished
+    file's bytes, which is what ``st.download_button`` needs.
+    """
+
+    def __init__(self, root=DEFAULT_EXPORT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, version, fmt):
+        extension, _ = EXPORT_FORMATS[fmt]
+        return os.path.join(self.root, f"{version}.{extension}")
+
+    def export(self, version, batches, fmt):
+        """Return the path of ``version`` in ``fmt``, writing it if needed.
+
+        ``batches`` is a callable returning an iterator of frames; it is only
+        called on a cache miss.
+        """
+        path = self.path(version, fmt)
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+                self.hits += 1
+                return path
+            self.misses += 1
+            tmp = path + ".tmp"
+            if fmt == "Parquet":
+                write_parquet(batches(), tmp)
+            else:
+                write_csv(batches(), tmp, compress=fmt == "CSV (gzip)")
+            os.replace(tmp, path)
+            self._evict(keep=path)
+        return path
+
+    def read(self, version, batches, fmt):
+        with open(self.export(version, batches, fmt), "rb") as fh:
+            return fh.read()
+
+    def _evict(self, keep=None):
+        files = []
+        for name in os.listdir(self.root):
+            full = os.path.join(self.root, name)
+            if name.endswith(".tmp") or not os.path.isfile(full):
+                continue
+            stat = os.stat(full)
+            files.append((stat.st_mtime, stat.st_size, full))
+        total = sum(size for _, size, _ in files)
+        for _, size, full in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if full == keep:
+                continue
+            os.remove(full)
+            total -= size
@@ -0,0 +1,353 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from financeapp.panel import TICKER_COL
+
+# An indicator reads named input arrays ("close", "high", "low", "return")
+# and returns {column: array} for every row it was given, plus the state a
+# later call needs to continue from the last row. ``lookback`` is how many
+# already-computed rows it must see again to extend a series exactly, and the
+# first ``warmup`` rows of a ticker are reported as NaN.
+Indicator = namedtuple("Indicator", "fn inputs lookback warmup columns")
+
+INDICATORS = {}
+
+INPUT_COLUMNS = {"high": "High", "low": "Low", "return": "Return"}
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def indicator(name, inputs, lookback, warmup, columns):
+    def decorate(fn):
+        INDICATORS[name] = Indicator(fn, tuple(inputs), lookback, warmup, columns)
+        return fn
+    return decorate
+
+
+# Windowed sums through cumulative sums, so every window costs O(1) and NaN
+# inputs only invalidate the windows that contain them
+def _rolling_sums(x, window):
+    valid = ~np.isnan(x)
+    offset = x[valid].mean() if valid.any() else 0.0
+    centered = np.where(valid, x - offset, 0.0)
+
+    def windowed(values):
+        c = np.concatenate(([0.0], np.cumsum(values)))
+        out = np.full(len(values), np.nan)
+        if len(values) >= window:
+            out[window - 1:] = c[window:] - c[:-window]
+        return out
+
+    count = windowed(valid.astype(np.float64))
+    s1 = windowed(centered)
+    s2 = windowed(centered * centered)
+    full = count == window
+    return offset, np.where(full, s1, np.nan), np.where(full, s2, np.nan)
+
+
+def rolling_mean(x, window):
+    offset, s1, _ = _rolling_sums(x, window)
+    return s1 / window + offset
+
+
+def rolling_std(x, window):
+    _, s1, s2 = _rolling_sums(x, window)
+    if window < 2:
+        return np.full(len(x), np.nan)
+    var = (s2 - s1 * s1 / window) / (window - 1)
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+# Recursive exponential average; ``seed`` is the value before x[0]
+def ema(x, alpha, seed=None):
+    if seed is not None:
+        x = np.concatenate(([seed], x))
+    out = pd.Series(x).ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy()
+    return out[1:] if seed is not None else out
+
+
+def shift(x, periods):
+    out = np.full(len(x), np.nan)
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    return out
+
+
+@indicator("sma", ["close"], lambda p: p["window"] - 1, lambda p: p["window"] - 1,
+           lambda p: [p.get("name", f"MA_{p['window']}")])
+def _sma(cols, state, window, name=None):
+    return {name or f"MA_{window}": rolling_mean(cols["close"], window)}, None
+
+
+@indicator("ema", ["close"], lambda p: 0, lambda p: p["span"] - 1,
+           lambda p: [f"EMA_{p['span']}"])
+def _ema(cols, state, span):
+    out = ema(cols["close"], 2.0 / (span + 1), seed=state)
+    return {f"EMA_{span}": out}, out[-1]
+
+
+@indicator("volatility", ["return"], lambda p: p["window"] - 1, lambda p: p["window"],
+           lambda p: [p.get("name", f"Volatility_{p['window']}")])
+def _volatility(cols, state, window, name=None):
+    return {name or f"Volatility_{window}": rolling_std(cols["return"], window)}, None
+
+
+@indicator("lags", ["return"], lambda p: max(p["lags"]), lambda p: max(p["lags"]),
+           lambda p: [f"Lag{lag}_Return" for lag in p["lags"]])
+def _lags(cols, state, lags):
+    return {f"Lag{lag}_Return": shift(cols["return"], lag) for lag in lags}, None
+
+
+@indicator("rsi", ["close"], lambda p: 1, lambda p: p["window"],
+           lambda p: [f"RSI_{p['window']}"])
+def _rsi(cols, state, window):
+    delta = np.diff(cols["close"], prepend=np.nan)
+    gain = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0))
+    loss = np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0))
+    seed_gain, seed_loss = state if state is not None else (None, None)
+    avg_gain = ema(gain, 1.0 / window, seed=seed_gain)
+    avg_loss = ema(loss, 1.0 / window, seed=seed_loss)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    rsi = np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, rsi)
+    return {f"RSI_{window}": rsi}, (avg_gain[-1], avg_loss[-1])
+
+
+@indicator("macd", ["close"], lambda p: 0, lambda p: p["slow"] + p["signal"] - 2,
+           lambda p: ["MACD", "MACD_Signal", "MACD_Hist"])
+def _macd(cols, state, fast, slow, signal):
+    seed_fast, seed_slow, seed_signal = state if state is not None else (None, None, None)
+    fast_ema = ema(cols["close"], 2.0 / (fast + 1), seed=seed_fast)
+    slow_ema = ema(cols["close"], 2.0 / (slow + 1), seed=seed_slow)
+    macd = fast_ema - slow_ema
+    signal_ema = ema(macd, 2.0 / (signal + 1), seed=seed_signal)
+    outputs = {"MACD": macd, "MACD_Signal": signal_ema, "MACD_Hist": macd - signal_ema}
+    return outputs, (fast_ema[-1], slow_ema[-1], signal_ema[-1])
+
+
+@indicator("bollinger", ["close"], lambda p: p["window"] - 1, lambda p: p["window"] - 1,
+           lambda p: [f"BB_Upper_{p['window']}", f"BB_Lower_{p['window']}", f"BB_PctB_{p['window']}"])
+def _bollinger(cols, state, window, k):
+    mid = rolling_mean(cols["close"], window)
+    std = rolling_std(cols["close"], window)
+    upper, lower = mid + k * std, mid - k * std
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pctb = (cols["close"] - lower) / (upper - lower)
+    return {
+        f"BB_Upper_{window}": upper,
+        f"BB_Lower_{window}": lower,
+        f"BB_PctB_{window}": pctb,
+    }, None
+
+
+@indicator("atr", ["high", "low", "close"], lambda p: 1, lambda p: p["window"],
+           lambda p: [f"ATR_{p['window']}"])
+def _atr(cols, state, window):
+    high, low, close = cols["high"], cols["low"], cols["close"]
+    prev_close = shift(close, 1)
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    if state is not None:
+        # Row 0 is the last row of the previous call and is already in the seed
+        tr[0] = np.nan
+    out = ema(tr, 1.0 / window, seed=state)
+    return {f"ATR_{window}": out}, out[-1]
+
+
+@indicator("zscore", ["close"], lambda p: p["window"] - 1, lambda p: p["window"] - 1,
+           lambda p: [f"ZScore_{p['window']}"])
+def _zscore(cols, state, window):
+    mean = rolling_mean(cols["close"], window)
+    std = rolling_std(cols["close"], window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {f"ZScore_{window}": (cols["close"] - mean) / std}, None
+
+
+# Named feature choices offered in the UI: label -> (indicator, params)
+FEATURE_SPECS = {
+    "MA_7": ("sma", {"window": 7}),
+    "MA_30": ("sma", {"window": 30}),
+    "Volatility": ("volatility", {"window": 30, "name": "Volatility"}),
+    "Lag1_Return": ("lags", {"lags": (1,)}),
+    "Return lags 1-5": ("lags", {"lags": (1, 2, 3, 4, 5)}),
+    "EMA_12": ("ema", {"span": 12}),
+    "EMA_26": ("ema", {"span": 26}),
+    "RSI_14": ("rsi", {"window": 14}),
+    "MACD (12, 26, 9)": ("macd", {"fast": 12, "slow": 26, "signal": 9}),
+    "Bollinger (20, 2)": ("bollinger", {"window": 20, "k": 2.0}),
+    "ATR_14": ("atr", {"window": 14}),
+    "ZScore_20": ("zscore", {"window": 20}),
+}
+
+
+def spec_columns(label):
+    name, params = FEATURE_SPECS[label]
+    return INDICATORS[name].columns(params)
+
+
+def available_specs(df, close_col="Close"):
+    mapping = dict(INPUT_COLUMNS, close=close_col)
+    return [
+        label for label, (name, _) in FEATURE_SPECS.items()
+        if all(mapping[i] in df.columns for i in INDICATORS[name].inputs)
+    ]
+
+
+def _spec_key(name, params):
+    return (name, tuple(sorted(params.items())))
+
+
+def _digest(hashes):
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+
+class FeatureEngine:
+    """Computes registered indicators per ticker with memoization.
+
+    Results are kept per (feature spec, ticker, input fingerprint). When a
+    ticker's inputs are the cached inputs plus appended rows, only the new
+    rows are computed, reusing each indicator's lookback window and state.
+    The least recently used results are dropped once they take more than
+    ``max_bytes``, so the number of tickers does not limit reuse.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.incremental = 0
+        self._entries = OrderedDict()
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def compute(self, df, labels, close_col="Close"):
+        """Return a frame of feature columns for ``labels`` aligned to ``df``."""
+        mapping = dict(INPUT_COLUMNS, close=close_col)
+        input_cols = [c for c in dict.fromkeys(mapping.values()) if c in df.columns]
+        if TICKER_COL in df.columns:
+            groups = df.groupby(TICKER_COL, observed=True, sort=False).indices
+        else:
+            groups = {"": np.arange(len(df))}
+
+        arrays = {c: df[c].to_numpy(dtype=np.float64) for c in input_cols}
+        row_hashes = pd.util.hash_pandas_object(df[input_cols], index=False).to_numpy()
+
+        columns = {}
+        for label in labels:
+            name, params = FEATURE_SPECS[label]
+            spec = INDICATORS[name]
+            key = _spec_key(name, params)
+            cols = [mapping[i] for i in spec.inputs]
+            for group, pos in groups.items():
+                group_cols = {i: arrays[c][pos] for i, c in zip(spec.inputs, cols)}
+                outputs = self._group_outputs(key, spec, params, group, group_cols, row_hashes[pos])
+                for column, values in outputs.items():
+                    if column not in columns:
+                        columns[column] = np.full(len(df), np.nan)
+                    columns[column][pos] = values
+        return pd.DataFrame(columns, index=df.index)
+
+    def _group_outputs(self, key, spec, params, group, cols, hashes):
+        digest = _digest(hashes)
+        with self._lock:
+            entry = self._entries.get((key, group, digest))
+            if entry is not None:
+                self._entries.move_to_end((key, group, digest))
+                self.hits += 1
+                return entry["outputs"]
+            previous = self._entries.get((key, group, self._latest.get((key, group))))
+
+        n = len(hashes)
+        m = 0 if previous is None else len(previous["hashes"])
+        if 0 < m < n and np.array_equal(hashes[:m], previous["hashes"]):
+            start = max(0, m - spec.lookback(params))
+            tail = {i: values[start:] for i, values in cols.items()}
+            fresh, state = spec.fn(tail, previous["state"], **params)
+            outputs = {
+                column: np.concatenate((previous["outputs"][column], values[m - start:]))
+                for column, values in fresh.items()
+            }
+            self.incremental += 1
+        else:
+            outputs, state = spec.fn(cols, None, **params)
+            outputs = {column: values.copy() for column, values in outputs.items()}
+            self.misses += 1
+        warmup = min(spec.warmup(params), n)
+        for values in outputs.values():
+            values[:warmup] = np.nan
+
+        size = hashes.nbytes + sum(values.nbytes for values in outputs.values())
+        with self._lock:
+            replaced = self._entries.pop((key, group, digest), None)
+            if replaced is not None:
+                self.bytes -= replaced["bytes"]
+            self._entries[(key, group, digest)] = {"hashes": hashes, "outputs": outputs, "state": state,
+                                                   "bytes": size}
+            self._latest[(key, group)] = digest
+            self.bytes += size
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted["bytes"]
+        return outputs
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "incremental": self.incremental,
+                "entries": len(self._entries), "bytes": self.bytes}
+
+
+class StreamingFeatures:
+    """Extends indicators bar by bar without looking at the full history.
+
+    Per ticker it keeps only each indicator's last ``lookback`` input rows
+    and its recursive state, so ``update`` costs O(window) per new bar.
+    """
+
+    def __init__(self, labels, close_col="Close"):
+        self.labels = list(labels)
+        self.mapping = dict(INPUT_COLUMNS, close=close_col)
+        self.columns = list(dict.fromkeys(c for label in self.labels for c in spec_columns(label)))
+        self._buffers = {}
+
+    def _groups(self, df):
+        if TICKER_COL in df.columns:
+            return df.groupby(TICKER_COL, observed=True, sort=False).indices
+        return {"": np.arange(len(df))}
+
+    def prime(self, df):
+        """Compute features for ``df`` and remember where each ticker stopped."""
+        return self._extend(df, reset=True)
+
+    def update(self, df):
+        """Feature rows for bars appended after the primed/updated data."""
+        return self._extend(df, reset=False)
+
+    def _extend(self, df, reset):
+        if reset:
+            self._buffers = {}
+        out = {c: np.full(len(df), np.nan) for c in self.columns}
+        for group, pos in self._groups(df).items():
+            for label in self.labels:
+                name, params = FEATURE_SPECS[label]
+                spec = INDICATORS[name]
+                new = {i: df[self.mapping[i]].to_numpy(dtype=np.float64)[pos] for i in spec.inputs}
+                buffer = self._buffers.get((label, group))
+                if buffer is None:
+                    buffer = {"cols": {i: np.empty(0) for i in spec.inputs}, "state": None, "count": 0}
+                tail = {i: np.concatenate((buffer["cols"][i], new[i])) for i in spec.inputs}
+                fresh, state = spec.fn(tail, buffer["state"], **params)
+                skip = len(tail[spec.inputs[0]]) - len(pos)
+                warmup = spec.warmup(params) - buffer["count"]
+                keep = spec.lookback(params)
+                for column, values in fresh.items():
+                    values = values[skip:].copy()
+                    values[:max(0, warmup)] = np.nan
+                    out[column][pos] = values
+                self._buffers[(label, group)] = {
+                    "cols": {i: v[len(v) - min(keep, len(v)):] for i, v in tail.items()},
+                    "state": state,
+                    "count": buffer["count"] + len(pos),
+                }
+        return pd.DataFrame(out, index=df.index)
@@ -0,0 +1,338 @@
+import hashlib
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.tseries.api import guess_datetime_format
+
+DEFAULT_DATA_DIR = os.environ.get(
+    "FINANCEAPP_DATA_DIR",
+    os.path.join(os.path.expanduser("~"), ".financeapp", "datasets"),
+)
+DEFAULT_CHUNKSIZE = 250_000
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+DATE_NAMES = ("date", "datetime", "time", "timestamp")
+NUMERIC_KINDS = ("int8", "int16", "int32", "int64", "float32", "float64")
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _source_size(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    size = getattr(source, "size", None)
+    if size is None and hasattr(source, "seek"):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+    return size
+
+
+# Smallest numeric kind that stores every value exactly: integers are
+# downcast, and floats stay float32 only if each one's shortest float32
+# decimal reads back as the same number
+def _numeric_kind(values):
+    numbers = values.dropna().to_numpy()
+    if not len(numbers):
+        return "float32"
+    if numbers.dtype.kind == "f" and np.isfinite(numbers).all() and (numbers == np.trunc(numbers)).all() \
+            and np.abs(numbers).max() < 2.0 ** 63:
+        numbers = numbers.astype(np.int64)
+    if numbers.dtype.kind in "iu":
+        kind = pd.to_numeric(numbers, downcast="integer").dtype.name
+        return kind if kind in NUMERIC_KINDS else "string"
+    as32 = numbers.astype(np.float32)
+    differs = as32 != numbers
+    if differs.any() and (as32[differs].astype(str).astype(np.float64) != numbers[differs]).any():
+        return "float64"
+    return "float32"
+
+
+# Narrowest kind that holds values of both kinds
+def _wider(old, new):
+    if old not in NUMERIC_KINDS or new not in NUMERIC_KINDS:
+        return old if old == new else "string"
+    kind = max(old, new, key=NUMERIC_KINDS.index)
+    # float32 holds integers exactly only up to 2**24
+    if kind == "float32" and min(old, new, key=NUMERIC_KINDS.index) in ("int32", "int64"):
+        return "float64"
+    return kind
+
+
+# Decide each column's storage type from the first chunk
+def infer_schema(chunk, date_cols=None, category_ratio=0.5):
+    kinds = {}
+    for name in chunk.columns:
+        column = chunk[name]
+        if pd.api.types.is_bool_dtype(column):
+            kinds[name] = ("bool", None)
+        elif pd.api.types.is_numeric_dtype(column):
+            kinds[name] = (_numeric_kind(column), None)
+        else:
+            sample = column.dropna().astype(str)
+            is_date = (date_cols is not None and name in date_cols) or (
+                date_cols is None and str(name).lower() in DATE_NAMES
+            )
+            fmt = guess_datetime_format(sample.iloc[0]) if is_date and len(sample) else None
+            if is_date:
+                kinds[name] = ("datetime", fmt)
+            elif len(sample) and sample.nunique() <= category_ratio * len(sample):
+                kinds[name] = ("category", None)
+            else:
+                kinds[name] = ("string", None)
+    return kinds
+
+
+def _arrow_type(kind):
+    if kind in NUMERIC_KINDS:
+        return pa.from_numpy_dtype(np.dtype(kind))
+    return {
+        "bool": pa.bool_(),
+        "datetime": pa.timestamp("ns"),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "string": pa.string(),
+    }[kind]
+
+
+# Typed frame for one chunk, plus the wider kinds of columns whose values did not fit
+def _convert(chunk, kinds):
+    converted = {}
+    needs = {}
+    for name, (kind, fmt) in kinds.items():
+        column = chunk[name]
+        if kind in NUMERIC_KINDS:
+            values = pd.to_numeric(column, errors="coerce")
+            needed = "string" if (column.notna() & values.isna()).any() else _wider(kind, _numeric_kind(values))
+            if needed != kind:
+                needs[name] = needed
+                continue
+            # Nullable integers keep missing values without turning the column into floats
+            converted[name] = values.astype(kind if kind.startswith("float") else kind.capitalize())
+        elif kind == "datetime":
+            values = pd.to_datetime(column, format=fmt, errors="coerce")
+            if (column.notna() & values.isna()).any():
+                needs[name] = "string"
+                continue
+            converted[name] = values
+        elif kind == "bool":
+            values = column.astype(str).str.lower().map({"true": True, "false": False})
+            if (column.notna() & values.isna()).any():
+                needs[name] = "string"
+                continue
+            converted[name] = values.astype("boolean")
+        else:
+            values = column.where(column.isna(), column.astype(str))
+            converted[name] = values.astype("category") if kind == "category" else values
+    return pd.DataFrame(converted), needs
+
+
+class _SchemaMismatch(Exception):
+    def __init__(self, needs):
+        super().__init__(needs)
+        self.needs = needs
+
+
+def _stream_csv(source, tmp, chunksize, date_cols, category_ratio, widened):
+    rows = chunks = 0
+    peak_rss = rss_bytes()
+    kinds = schema = writer = None
+    needs = {}
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with pd.read_csv(source, chunksize=chunksize, low_memory=False) as reader:
+            for chunk in reader:
+                if kinds is None:
+                    kinds = infer_schema(chunk, date_cols, category_ratio)
+                    kinds.update({c: (kind, None) for c, kind in widened.items() if c in kinds})
+                    schema = pa.schema([(str(c), _arrow_type(kind)) for c, (kind, _) in kinds.items()])
+                    writer = pq.ParquetWriter(tmp, schema)
+                    digest.update(repr(schema).encode())
+                frame, lost = _convert(chunk, kinds)
+                # Keep scanning without writing, so one more pass settles every column
+                if lost or needs:
+                    needs.update(lost)
+                    kinds.update({c: (kind, None) for c, kind in lost.items()})
+                    continue
+                frame.columns = [str(c) for c in frame.columns]
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+                rows += len(frame)
+                chunks += 1
+                peak_rss = max(peak_rss, rss_bytes())
+                del chunk, frame
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("The CSV file has no rows")
+    if needs:
+        raise _SchemaMismatch(needs)
+    return rows, chunks, kinds, digest.hexdigest(), peak_rss
+
+
+class DatasetHandle:
+    """Reference to an ingested Parquet file; data is read only on demand."""
+
+    def __init__(self, path, report=None):
+        self.path = path
+        self.report = report or {}
+
+    @property
+    def _file(self):
+        return pq.ParquetFile(self.path, memory_map=True)
+
+    @property
+    def num_rows(self):
+        return self._file.metadata.num_rows
+
+    @property
+    def columns(self):
+        return self._file.schema_arrow.names
+
+    def read(self, columns=None):
+        # Reads count as use, so eviction drops the files nobody has opened lately
+        os.utime(self.path)
+        return pq.read_table(self.path, columns=columns, memory_map=True).to_pandas()
+
+    def head(self, n=10):
+        batches = self._file.iter_batches(batch_size=n)
+        batch = next(batches, None)
+        if batch is None:
+            return self._file.schema_arrow.empty_table().to_pandas()
+        return batch.to_pandas()
+
+    def iter_batches(self, columns=None, batch_size=DEFAULT_CHUNKSIZE):
+        for batch in self._file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+
+    def describe(self):
+        """count/mean/std/min/max of numeric columns, one row group at a time."""
+        schema = self._file.schema_arrow
+        numeric = [f.name for f in schema if pa.types.is_floating(f.type) or pa.types.is_integer(f.type)]
+        stats = {}
+        for batch in self.iter_batches(columns=numeric):
+            for name in numeric:
+                values = batch[name].to_numpy(dtype=np.float64)
+                values = values[~np.isnan(values)]
+                if not len(values):
+                    continue
+                s = stats.setdefault(name, {"shift": values[0], "n": 0, "s1": 0.0, "s2": 0.0,
+                                            "min": np.inf, "max": -np.inf})
+                centered = values - s["shift"]
+                s["n"] += len(values)
+                s["s1"] += centered.sum()
+                s["s2"] += (centered * centered).sum()
+                s["min"] = min(s["min"], values.min())
+                s["max"] = max(s["max"], values.max())
+        rows = {}
+        for name in numeric:
+            s = stats.get(name)
+            if s is None:
+                rows[name] = [0, np.nan, np.nan, np.nan, np.nan]
+                continue
+            mean = s["s1"] / s["n"]
+            var = (s["s2"] - s["n"] * mean * mean) / (s["n"] - 1) if s["n"] > 1 else np.nan
+            rows[name] = [s["n"], mean + s["shift"], np.sqrt(max(var, 0.0)), s["min"], s["max"]]
+        return pd.DataFrame(rows, index=["count", "mean", "std", "min", "max"])
+
+
+# Drop the least recently used dataset files until the directory fits in max_bytes
+def _evict(out_dir, max_bytes, keep=None):
+    files = []
+    for name in os.listdir(out_dir):
+        full = os.path.join(out_dir, name)
+        if not name.endswith(".parquet") or not os.path.isfile(full):
+            continue
+        stat = os.stat(full)
+        files.append((stat.st_mtime, stat.st_size, full))
+    total = sum(size for _, size, _ in files)
+    for _, size, full in sorted(files):
+        if total <= max_bytes:
+            break
+        if full == keep:
+            continue
+        os.remove(full)
+        total -= size
+
+
+def ingest_csv(source, out_dir=DEFAULT_DATA_DIR, name=None, chunksize=DEFAULT_CHUNKSIZE,
+               date_cols=None, category_ratio=0.5, max_bytes=DEFAULT_MAX_BYTES):
+    """Stream a CSV into a Parquet file and return a :class:`DatasetHandle`.
+
+    The CSV is read ``chunksize`` rows at a time. Column types are fixed from
+    the first chunk: integers are downcast to the smallest integer type,
+    floats become float32 when that loses no digits and float64 otherwise,
+    date-like columns are parsed with a format guessed once, and repetitive
+    text becomes categorical. Each chunk is written as one row group, so
+    memory stays bounded by the chunk size.
+
+    If later chunks hold values a column type cannot represent exactly, the
+    rest of the file is scanned for the types every column needs and the
+    source is read once more with them; ``report["widened"]`` maps those
+    columns to their final type. Sources that cannot be rewound raise
+    ``ValueError`` instead.
+
+    Files are named by content hash, so ingesting the same data again
+    reuses its file, and the least recently used files are removed once
+    ``out_dir`` exceeds ``max_bytes``.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if name is None:
+        name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", None)
+    stem = os.path.splitext(os.path.basename(name or "dataset"))[0]
+    tmp = os.path.join(out_dir, f".{uuid.uuid4().hex}.parquet.tmp")
+
+    started = time.perf_counter()
+    start_rss = rss_bytes()
+    start_pos = source.tell() if hasattr(source, "tell") else None
+    widened = {}
+    try:
+        while True:
+            try:
+                rows, chunks, kinds, content_hash, peak_rss = _stream_csv(
+                    source, tmp, chunksize, date_cols, category_ratio, widened
+                )
+                break
+            except _SchemaMismatch as e:
+                if not isinstance(source, (str, os.PathLike)) and start_pos is None:
+                    raise ValueError(
+                        f"Values in later rows do not fit the column types of the first chunk: {e.needs}"
+                    ) from None
+                widened.update(e.needs)
+                if start_pos is not None:
+                    source.seek(start_pos)
+        path = os.path.join(out_dir, f"{stem}-{content_hash[:16]}.parquet")
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    _evict(out_dir, max_bytes, keep=path)
+
+    report = {
+        "rows": rows,
+        "chunks": chunks,
+        "csv_bytes": _source_size(source),
+        "parquet_bytes": os.path.getsize(path),
+        "seconds": time.perf_counter() - started,
+        "start_rss": start_rss,
+        "peak_rss": peak_rss,
+        "column_types": {c: kind for c, (kind, _) in kinds.items()},
+        "widened": widened,
+        "content_hash": content_hash,
+    }
+    return DatasetHandle(path, report)
@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from financeapp.online import OnlineLinearRegression
+from financeapp.validation import walk_forward
+
+
+class PersistenceModel(RegressorMixin, BaseEstimator):
+    """Baseline that predicts the previous value of the target.
+
+    ``lag_index`` is the feature column holding the target's one-step lag;
+    without one the last training target is repeated.
+    """
+
+    def __init__(self, lag_index=None):
+        self.lag_index = lag_index
+
+    def fit(self, X, y):
+        y = np.asarray(y, dtype=np.float64)
+        self.last_value_ = y[-1] if len(y) else 0.0
+        return self
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.lag_index is None:
+            return np.full(len(X), self.last_value_)
+        return X[:, self.lag_index]
+
+
+# Model name -> (estimator factory, default search space)
+MODELS = {
+    "Linear Regression": (LinearRegression, {}),
+    "Ridge": (Ridge, {"alpha": [0.01, 0.1, 1.0, 10.0, 100.0]}),
+    "Lasso": (Lasso, {"alpha": [1e-5, 1e-4, 1e-3, 1e-2, 1e-1]}),
+    "Gradient Boosting": (GradientBoostingRegressor, {
+        "n_estimators": [100, 300],
+        "learning_rate": [0.03, 0.1],
+        "max_depth": [2, 3],
+    }),
+    "Random Forest": (RandomForestRegressor, {
+        "n_estimators": [100, 300],
+        "max_depth": [None, 5, 10],
+        "min_samples_leaf": [1, 5],
+    }),
+    "Online Linear Regression": (OnlineLinearRegression, {"forgetting": [1.0, 0.999, 0.995, 0.99]}),
+    "Persistence": (PersistenceModel, {}),
+}
+
+
+def make_model(name, params=None):
+    factory, _ = MODELS[name]
+    return factory(**(params or {}))
+
+
+def param_candidates(name, mode="grid", n_iter=10, seed=42):
+    _, space = MODELS[name]
+    if not space or mode == "default":
+        return [{}]
+    if mode == "grid":
+        return list(ParameterGrid(space))
+    if mode == "random":
+        return list(ParameterSampler(space, n_iter=min(n_iter, len(ParameterGrid(space))), random_state=seed))
+    raise ValueError(f"Unknown search mode: {mode}")
+
+
+def artifact_key(name, fixed_params, features, fingerprint, mode="default", n_iter=None):
+    return (
+        name,
+        tuple(sorted((fixed_params or {}).items())),
+        tuple(features),
+        fingerprint,
+        mode,
+        n_iter if mode == "random" else None,
+    )
+
+
+class ModelCache:
+    """LRU of fitted models keyed by (model, params, features, split)."""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Runs in a worker process: walk-forward MSE of one candidate on the training set
+def _score_candidate(name, params, train_df, features, target, n_splits):
+    started = time.perf_counter()
+    _, summary, _ = walk_forward(train_df, features, target, make_model(name, params), n_splits=n_splits)
+    return summary["Mean MSE"], summary["Mean R2"], time.perf_counter() - started
+
+
+class SearchJob:
+    """Hyperparameter search that runs off the caller's thread.
+
+    Candidates are scored by walk-forward validation on the training data in
+    a process pool; the best one is then refit on all training rows. Poll
+    ``done``/``total``/``status`` for progress and call ``cancel()`` to stop
+    pending candidates. With a single candidate the model is fit directly.
+    """
+
+    def __init__(self, name, candidates, X_train, y_train, dates=None, fixed_params=None,
+                 n_splits=3, n_jobs=1, cache=None, cache_key=None):
+        self.name = name
+        self.candidates = candidates
+        self.X_train = X_train
+        self.y_train = y_train
+        self.dates = dates
+        self.fixed_params = fixed_params or {}
+        self.n_splits = n_splits
+        self.n_jobs = n_jobs
+        self.cache = cache
+        self.cache_key = cache_key
+        self.total = len(candidates) if len(candidates) > 1 else 0
+        self.done = 0
+        self.results = []
+        self.status = "pending"
+        self.error = None
+        self.model = None
+        self.best_params = None
+        self.seconds = 0.0
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.status = "running"
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "cancelled", "failed")
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.finished
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            best = self.candidates[0] if self.candidates else {}
+            if len(self.candidates) > 1:
+                best = self._search()
+            if self._cancelled.is_set():
+                self.status = "cancelled"
+                return
+            params = dict(self.fixed_params, **best)
+            model = make_model(self.name, params)
+            model.fit(self.X_train, self.y_train)
+            self.model, self.best_params = model, best
+            if self.cache is not None and self.cache_key is not None:
+                self.cache.put(self.cache_key, {
+                    "model": model, "params": best, "results": self.results_frame(),
+                })
+            self.status = "done"
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+        finally:
+            self.seconds = time.perf_counter() - started
+
+    def _search(self):
+        features = list(self.X_train.columns)
+        target = self.y_train.name or "target"
+        train_df = self.X_train.assign(**{target: self.y_train.to_numpy()})
+        if self.dates is not None:
+            train_df["Date"] = np.asarray(self.dates)
+
+        pool = ProcessPoolExecutor(max_workers=max(1, self.n_jobs))
+        try:
+            futures = {
+                pool.submit(
+                    _score_candidate, self.name, dict(self.fixed_params, **params),
+                    train_df, features, target, self.n_splits,
+                ): params
+                for params in self.candidates
+            }
+            pending = set(futures)
+            # Wake up regularly so a cancel does not wait for a slow candidate
+            while pending and not self._cancelled.is_set():
+                completed, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    mse, r2, seconds = future.result()
+                    self.results.append({"params": futures[future], "MSE": mse, "R2": r2, "Seconds": seconds})
+                    self.done += 1
+        finally:
+            pool.shutdown(wait=not self._cancelled.is_set(), cancel_futures=True)
+
+        if not self.results:
+            return {}
+        return min(self.results, key=lambda r: r["MSE"])["params"]
+
+    def results_frame(self):
+        if not self.results:
+            return None
+        frame = pd.DataFrame(self.results)
+        params = pd.json_normalize(frame.pop("params"))
+        return pd.concat([params, frame], axis=1).sort_values("MSE").reset_index(drop=True)
+
+
+# Per-feature weights for display: coefficients or impurity importances
+def feature_weights(model, features):
+    if hasattr(model, "coef_"):
+        return "Coefficient", np.ravel(model.coef_)
+    if hasattr(model, "feature_importances_"):
+        return "Importance", model.feature_importances_
+    return None, None
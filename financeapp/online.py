@@ -0,0 +1,160 @@
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin
+
+from financeapp.features import StreamingFeatures
+from financeapp.panel import DATE_COL, TICKER_COL
+
+
+class OnlineLinearRegression(RegressorMixin, BaseEstimator):
+    """Least squares updated from running sufficient statistics.
+
+    The model keeps the weighted means and centred co-moments of X and y
+    (XᵀX and Xᵀy about the mean, merged batch by batch), so each
+    ``partial_fit`` costs O(k·p² + p³) for k new rows and p features,
+    independent of the history. ``forgetting`` < 1 discounts every older
+    row by that factor per new row (exponentially weighted least squares).
+    """
+
+    def __init__(self, forgetting=1.0, ridge=1e-10):
+        self.forgetting = forgetting
+        self.ridge = ridge
+
+    def fit(self, X, y):
+        for name in ("n_", "mean_x_", "mean_y_", "cxx_", "cxy_"):
+            if hasattr(self, name):
+                delattr(self, name)
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        ok = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+        X, y = X[ok], y[ok]
+        p = X.shape[1]
+        if not hasattr(self, "n_"):
+            self.n_ = 0.0
+            self.mean_x_, self.mean_y_ = np.zeros(p), 0.0
+            self.cxx_, self.cxy_ = np.zeros((p, p)), np.zeros(p)
+            self.n_features_in_ = p
+
+        k = len(y)
+        if k:
+            decay = self.forgetting ** k
+            weights = self.forgetting ** np.arange(k - 1, -1, -1, dtype=np.float64)
+            n_batch = weights.sum()
+            mean_x = weights @ X / n_batch
+            mean_y = weights @ y / n_batch
+            dx, dy = X - mean_x, y - mean_y
+            n_old = decay * self.n_
+            n_new = n_old + n_batch
+            delta_x, delta_y = mean_x - self.mean_x_, mean_y - self.mean_y_
+            share = n_old * n_batch / n_new
+            self.cxx_ = decay * self.cxx_ + (dx * weights[:, None]).T @ dx + share * np.outer(delta_x, delta_x)
+            self.cxy_ = decay * self.cxy_ + (dx * weights[:, None]).T @ dy + share * delta_x * delta_y
+            self.mean_x_ = self.mean_x_ + delta_x * n_batch / n_new
+            self.mean_y_ = self.mean_y_ + delta_y * n_batch / n_new
+            self.n_ = n_new
+
+        # Relative to each feature's own variance, so it only guards against singular systems
+        penalty = np.diag(self.ridge * np.diag(self.cxx_))
+        self.coef_ = np.linalg.lstsq(self.cxx_ + penalty, self.cxy_, rcond=None)[0]
+        self.intercept_ = self.mean_y_ - self.mean_x_ @ self.coef_
+        return self
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+class OnlinePipeline:
+    """Keeps features and an online regression current as daily bars arrive.
+
+    ``prime`` runs once on the preprocessed history. Each ``append`` then
+    computes returns from the last known close, extends the features from
+    their rolling buffers, predicts the new rows with the current model and
+    folds them into it. Tickers missing from the history start warming up
+    from their first appended bar.
+    """
+
+    def __init__(self, labels, target="Return", close_col="Close", forgetting=1.0, max_abs_return=0.5):
+        self.features = StreamingFeatures(labels, close_col)
+        self.target = target
+        self.close_col = close_col
+        self.max_abs_return = max_abs_return
+        self.model = OnlineLinearRegression(forgetting=forgetting)
+        self.last_close = {}
+        self.last_date = {}
+        self.last_update_seconds = None
+
+    @property
+    def columns(self):
+        return self.features.columns
+
+    @staticmethod
+    def _tickers(df):
+        if TICKER_COL in df.columns:
+            return df[TICKER_COL].astype(str).to_numpy()
+        return np.full(len(df), "")
+
+    def _remember(self, df):
+        tickers = self._tickers(df)
+        last = pd.DataFrame({"t": tickers, "c": df[self.close_col].to_numpy(), "d": df[DATE_COL].to_numpy()})
+        last = last.groupby("t", sort=False).last()
+        self.last_close.update(last["c"].to_dict())
+        self.last_date.update(last["d"].to_dict())
+
+    def _usable(self, features, y):
+        ok = features.notna().all(axis=1).to_numpy() & ~np.isnan(y)
+        if self.target == "Return":
+            ok &= np.abs(y) < self.max_abs_return
+        return ok
+
+    def prime(self, df):
+        features = self.features.prime(df)
+        y = df[self.target].to_numpy(dtype=np.float64)
+        ok = self._usable(features, y)
+        self.model.fit(features.to_numpy()[ok], y[ok])
+        self._remember(df)
+        return self
+
+    def append(self, bars):
+        """Update with new bars and return their out-of-sample predictions."""
+        started = time.perf_counter()
+        bars = bars.sort_values([c for c in (TICKER_COL, DATE_COL) if c in bars.columns], kind="stable")
+        tickers = self._tickers(bars)
+        seen = pd.Series(tickers).map(self.last_date)
+        new = (seen.isna() | (bars[DATE_COL].to_numpy() > seen)).to_numpy()
+        bars, tickers = bars[new], tickers[new]
+        if bars.empty:
+            self.last_update_seconds = time.perf_counter() - started
+            return pd.DataFrame(columns=[DATE_COL, self.target, "Predicted"])
+
+        # Returns continue from each ticker's last close; gaps are carried forward
+        close = bars[self.close_col].to_numpy(dtype=np.float64)
+        previous = np.empty_like(close)
+        for i, ticker in enumerate(tickers):
+            prior = self.last_close.get(ticker, np.nan)
+            if np.isnan(close[i]):
+                close[i] = prior
+            previous[i] = prior if i == 0 or tickers[i - 1] != ticker else close[i - 1]
+        bars = bars.assign(**{self.close_col: close, "Return": close / previous - 1})
+
+        features = self.features.update(bars)
+        X = features.to_numpy()
+        y = bars[self.target].to_numpy(dtype=np.float64)
+        complete = features.notna().all(axis=1).to_numpy()
+        predicted = np.full(len(bars), np.nan)
+        if hasattr(self.model, "coef_") and complete.any():
+            predicted[complete] = self.model.predict(X[complete])
+        ok = self._usable(features, y)
+        self.model.partial_fit(X[ok], y[ok])
+
+        self._remember(bars)
+        self.last_update_seconds = time.perf_counter() - started
+
+        result = bars[[c for c in (TICKER_COL, DATE_COL) if c in bars.columns]].copy()
+        result[self.target] = y
+        result["Predicted"] = predicted
+        return result.reset_index(drop=True)
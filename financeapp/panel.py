@@ -0,0 +1,58 @@
+import pandas as pd
+
+from financeapp.price_store import PRICE_COLUMNS
+
+# Frames from the universe mode carry a Ticker column; single-ticker and
+# uploaded frames do not, and every helper here handles both.
+TICKER_COL = "Ticker"
+DATE_COL = "Date"
+
+
+# Stack per-ticker bars into one panel indexed by (Ticker, Date)
+def build_panel(frames, price_col="Close"):
+    pieces = []
+    for ticker, frame in frames.items():
+        if frame is None or frame.empty:
+            continue
+        frame = frame[[c for c in PRICE_COLUMNS if c in frame.columns]].copy()
+        frame.index = pd.DatetimeIndex(frame.index, name=DATE_COL)
+        frame[TICKER_COL] = ticker
+        pieces.append(frame.reset_index())
+    if not pieces:
+        columns = [TICKER_COL, DATE_COL] + PRICE_COLUMNS + ["Return"]
+        return pd.DataFrame(columns=columns).set_index([TICKER_COL, DATE_COL])
+
+    panel = pd.concat(pieces, ignore_index=True)
+    panel[TICKER_COL] = panel[TICKER_COL].astype("category")
+    panel = panel.set_index([TICKER_COL, DATE_COL]).sort_index()
+    panel = panel.astype({c: "float64" for c in panel.columns})
+    panel["Return"] = panel.groupby(level=TICKER_COL, observed=True)[price_col].pct_change()
+    return panel
+
+
+def grouped(df):
+    if TICKER_COL in df.columns:
+        return df.groupby(TICKER_COL, observed=True, sort=False)
+    if TICKER_COL in df.index.names:
+        return df.groupby(level=TICKER_COL, observed=True, sort=False)
+    return None
+
+
+# Fill gaps within each ticker and drop extreme returns
+def preprocess(df, max_abs_return=0.5):
+    groups = grouped(df)
+    if groups is None:
+        df = df.ffill().bfill()
+    else:
+        value_cols = [c for c in df.columns if c != TICKER_COL]
+        df = df.copy()
+        df[value_cols] = groups[value_cols].ffill()
+        df[value_cols] = grouped(df)[value_cols].bfill()
+    if "Return" in df.columns:
+        df = df[(df["Return"] > -max_abs_return) & (df["Return"] < max_abs_return)]
+    return df
+
+
+def parse_tickers(text):
+    tokens = text.replace(",", " ").split()
+    return list(dict.fromkeys(t.strip().upper() for t in tokens if t.strip()))
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, r2_score
+
+from financeapp.features import FEATURE_SPECS, FeatureEngine, spec_columns
+from financeapp.models import make_model
+from financeapp.panel import TICKER_COL, build_panel, preprocess
+from financeapp.price_store import PriceStore
+from financeapp.profiling import stage
+from financeapp.validation import parallel_map, time_split, walk_forward
+
+DEFAULT_FEATURES = ["MA_7", "MA_30", "Volatility", "Lag1_Return"]
+
+
+# Long (Ticker, Date, OHLCV, Return) frame for a universe, via the price cache
+def load_prices(tickers, start, end, store=None, max_workers=4, profiler=None):
+    store = store if store is not None else PriceStore()
+    with stage(profiler, "load") as timing:
+        frames = store.get_many(tickers, start, end, max_workers=max_workers)
+        prices = build_panel(frames).reset_index()
+        timing["rows"] = len(prices)
+    return prices
+
+
+def feature_columns(labels):
+    return list(dict.fromkeys(c for label in labels for c in spec_columns(label)))
+
+
+# Add the selected indicators and drop rows still in their warm-up window
+def build_features(df, labels, close_col="Close", engine=None, profiler=None):
+    engine = engine if engine is not None else FeatureEngine()
+    columns = feature_columns(labels)
+    with stage(profiler, "features", len(df)):
+        computed = engine.compute(df, labels, close_col)
+        featured = df.assign(**{c: computed[c] for c in columns})
+    return featured.dropna(subset=columns), columns
+
+
+def evaluate(y_true, y_pred):
+    return {
+        "MSE": mean_squared_error(y_true, y_pred),
+        "R2": r2_score(y_true, y_pred) if len(y_true) > 1 else np.nan,
+        "Rows": len(y_true),
+    }
+
+
+def run_pipeline(df, labels=DEFAULT_FEATURES, target="Return", close_col="Close",
+                 model="Linear Regression", params=None, test_size=0.3, n_splits=None,
+                 engine=None, profiler=None):
+    """Preprocess, add features, split chronologically, fit and score one frame.
+
+    With ``n_splits`` the model is also backtested walk-forward on the
+    featured data. Returns a dict with ``metrics``, out-of-sample
+    ``predictions`` (one row per test row), the fitted ``model`` and, when
+    requested, the ``walk_forward`` summary.
+    """
+    with stage(profiler, "preprocess", len(df)):
+        processed = preprocess(df)
+    featured, columns = build_features(processed, labels, close_col, engine, profiler)
+    with stage(profiler, "split", len(featured)):
+        train_idx, test_idx = time_split(featured, test_size)
+    X, y = featured[columns], featured[target]
+
+    estimator = make_model(model, params)
+    with stage(profiler, "train", len(train_idx)):
+        estimator.fit(X.iloc[train_idx], y.iloc[train_idx])
+    with stage(profiler, "predict", len(test_idx)):
+        y_pred = estimator.predict(X.iloc[test_idx])
+
+    keys = [c for c in (TICKER_COL, "Date") if c in featured.columns]
+    predictions = featured.iloc[test_idx][keys].copy()
+    predictions[target] = y.iloc[test_idx].to_numpy()
+    predictions["Predicted"] = y_pred
+
+    result = {
+        "metrics": dict(evaluate(y.iloc[test_idx], y_pred), **{"Train Rows": len(train_idx)}),
+        "predictions": predictions.reset_index(drop=True),
+        "model": estimator,
+        "features": columns,
+    }
+    if n_splits:
+        with stage(profiler, "walk_forward", len(featured)):
+            _, summary, _ = walk_forward(featured, columns, target, make_model(model, params), n_splits=n_splits)
+        result["walk_forward"] = summary
+    return result
+
+
+def _run_one(ticker, df, kwargs):
+    try:
+        result = run_pipeline(df, **kwargs)
+    except ValueError as e:
+        return ticker, None, str(e)
+    result.pop("model")
+    return ticker, result, None
+
+
+def run_universe(df, per_ticker=True, n_jobs=1, **kwargs):
+    """Run the pipeline on a long frame, one independent model per ticker.
+
+    Tickers are independent and are spread over ``n_jobs`` processes. With ``per_ticker=False`` a single pooled model is fit on the
+    whole panel. Returns ``(metrics, predictions, errors)``; ``errors`` maps
+    tickers that could not be modelled to the reason.
+    """
+    if not per_ticker or TICKER_COL not in df.columns:
+        result = run_pipeline(df, **kwargs)
+        metrics = pd.DataFrame([dict(result["metrics"], **result.get("walk_forward", {}))])
+        return metrics, result["predictions"], {}
+
+    groups = [
+        (str(ticker), group.reset_index(drop=True))
+        for ticker, group in df.groupby(TICKER_COL, observed=True, sort=True)
+    ]
+    outcomes = parallel_map(_run_one, [(ticker, group, kwargs) for ticker, group in groups], n_jobs)
+
+    rows, predictions, errors = [], [], {}
+    for ticker, result, error in outcomes:
+        if result is None:
+            errors[ticker] = error
+            continue
+        rows.append(dict({TICKER_COL: ticker}, **result["metrics"], **result.get("walk_forward", {})))
+        predictions.append(result["predictions"])
+    metrics = pd.DataFrame(rows)
+    predictions = pd.concat(predictions, ignore_index=True) if predictions else pd.DataFrame()
+    return metrics, predictions, errors
+
+
+def resolve_features(names):
+    """Map loosely written feature names (case, spaces) to registered labels."""
+    def canonical(text):
+        return "".join(text.lower().split())
+
+    labels = {canonical(label): label for label in FEATURE_SPECS}
+    resolved = []
+    for name in names:
+        label = labels.get(canonical(name))
+        if label is None:
+            raise ValueError(f"Unknown feature: {name}. Available: {', '.join(FEATURE_SPECS)}")
+        resolved.append(label)
+    return resolved
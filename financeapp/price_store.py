@@ -0,0 +1,360 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+DEFAULT_CACHE_DIR = os.environ.get(
+    "FINANCEAPP_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".financeapp", "prices"),
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_WORKERS = 4
+# yfinance reports a range without bars (weekend, holiday) as this error
+NO_PRICE_DATA = "no price data found"
+
+
+def _day(value):
+    return pd.Timestamp(value).normalize().tz_localize(None)
+
+
+def completed_end(today=None):
+    """Exclusive end date of the daily bars that are final as of ``today``.
+
+    That is the day after the last weekday before today, since today's bar
+    is still forming.
+    """
+    today = _day(today if today is not None else pd.Timestamp.today())
+    return pd.offsets.BDay().rollback(today - pd.Timedelta(days=1)) + pd.Timedelta(days=1)
+
+
+# Whether [start, end) holds a weekday; gaps without one cannot have bars
+def _has_sessions(start, end):
+    return len(pd.bdate_range(start, end - pd.Timedelta(days=1))) > 0
+
+
+# Subtract the covered [start, end) intervals from the requested one
+def _missing_ranges(covered, start, end):
+    gaps = []
+    cursor = start
+    for lo, hi in sorted(covered):
+        if hi <= cursor:
+            continue
+        if lo >= end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo))
+        cursor = max(cursor, hi)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+class YahooProvider:
+    """Downloads daily bars from Yahoo Finance, end date exclusive.
+
+    Providers return an empty frame only when the range has no bars. A
+    failed request raises from ``download``, and ``download_many`` leaves
+    the failed tickers out of its result. Requests run one at a time; each
+    batch is spread over yfinance's own download threads.
+    """
+
+    # yf.download resets and refills module-level result and error dicts, so
+    # concurrent calls would overwrite each other's tickers; one call at a
+    # time, each using yfinance's own threads for the batch
+    _lock = threading.Lock()
+
+    def _download(self, tickers, start, end):
+        import yfinance as yf
+
+        with self._lock:
+            data = yf.download(
+                tickers, start=start, end=end, group_by="ticker",
+                threads=True, progress=False,
+            )
+            errors = dict(yf.shared._ERRORS)
+        failed = {ticker for ticker, error in errors.items() if NO_PRICE_DATA not in error.lower()}
+        return data, failed, errors
+
+    def download(self, ticker, start, end):
+        data, failed, errors = self._download([ticker], start, end)
+        if ticker.upper() in failed:
+            raise RuntimeError(f"Download of {ticker} failed: {errors[ticker.upper()]}")
+        if isinstance(data.columns, pd.MultiIndex):
+            data = data[ticker] if ticker in data.columns.get_level_values(0) else pd.DataFrame()
+        return data.dropna(how="all")
+
+    def download_many(self, tickers, start, end):
+        data, failed, _ = self._download(list(tickers), start, end)
+        frames = {}
+        for ticker in tickers:
+            if ticker.upper() in failed:
+                continue
+            if isinstance(data.columns, pd.MultiIndex):
+                frame = data[ticker] if ticker in data.columns.get_level_values(0) else pd.DataFrame()
+            else:
+                frame = data
+            frames[ticker] = frame.dropna(how="all")
+        return frames
+
+
+class FrameProvider:
+    """Serves bars from in-memory frames, for offline use and tests."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def download(self, ticker, start, end):
+        self.calls.append((ticker, start, end))
+        frame = self.frames.get(ticker)
+        if frame is None:
+            raise KeyError(f"Unknown ticker: {ticker}")
+        return frame[(frame.index >= start) & (frame.index < end)]
+
+    def download_many(self, tickers, start, end):
+        frames = {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = self.download(ticker, start, end)
+            except KeyError:
+                pass
+        return frames
+
+
+class PriceStore:
+    """Per-ticker Parquet cache that only asks the provider for missing dates.
+
+    Each ticker lives in ``<root>/<TICKER>.parquet``; a JSON manifest records
+    which date ranges were already requested (so weekends and holidays are not
+    refetched) and when each ticker was last read, for LRU eviction once the
+    files exceed ``max_bytes``. Ranges without a weekday are covered without
+    asking the provider; a range whose request failed is asked for again.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, provider=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.provider = provider if provider is not None else YahooProvider()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.errors = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        self._ticker_locks = {}
+        os.makedirs(root, exist_ok=True)
+        self._manifest_path = os.path.join(root, "_manifest.json")
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self._manifest, fh)
+        os.replace(tmp, self._manifest_path)
+
+    def _path(self, ticker):
+        return os.path.join(self.root, f"{ticker.upper()}.parquet")
+
+    def _ticker_lock(self, ticker):
+        with self._lock:
+            return self._ticker_locks.setdefault(ticker.upper(), threading.Lock())
+
+    def _covered(self, ticker):
+        entry = self._manifest.get(ticker.upper(), {})
+        return [(pd.Timestamp(lo), pd.Timestamp(hi)) for lo, hi in entry.get("ranges", [])]
+
+    def _read(self, ticker):
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def _write(self, ticker, frame):
+        path = self._path(ticker)
+        tmp = path + ".tmp"
+        frame.to_parquet(tmp)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _normalize(frame):
+        frame = frame.copy()
+        frame.index = pd.DatetimeIndex(frame.index).tz_localize(None).normalize()
+        frame.index.name = "Date"
+        columns = [c for c in PRICE_COLUMNS if c in frame.columns]
+        return frame[columns].astype("float64")
+
+    def get(self, ticker, start, end):
+        """Return bars for ``ticker`` in ``[start, end)`` indexed by Date."""
+        ticker = ticker.upper()
+        start, end = _day(start), _day(end)
+        with self._ticker_lock(ticker):
+            gaps = _missing_ranges(self._covered(ticker), start, end)
+            fetched = []
+            for lo, hi in gaps:
+                if not _has_sessions(lo, hi):
+                    fetched.append(pd.DataFrame(columns=PRICE_COLUMNS))
+                    continue
+                try:
+                    fetched.append(self.provider.download(ticker, lo, hi))
+                except Exception:
+                    with self._lock:
+                        self.errors += 1
+                    raise
+                finally:
+                    with self._lock:
+                        self.fetches += 1
+            return self._store(ticker, start, end, gaps, fetched)
+
+    def get_many(self, tickers, start, end, batch_size=DEFAULT_BATCH_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS):
+        """Return ``{ticker: bars}`` for many tickers, fetching gaps in batches.
+
+        Tickers missing the same date range are downloaded together through
+        the provider's ``download_many``, ``batch_size`` symbols per request,
+        with at most ``max_workers`` requests in flight. Tickers whose request
+        failed come back with whatever was already cached.
+        """
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        start, end = _day(start), _day(end)
+
+        fetched = {ticker: {} for ticker in tickers}
+        by_gap = {}
+        for ticker in tickers:
+            gaps = _missing_ranges(self._covered(ticker), start, end)
+            for gap in gaps:
+                if _has_sessions(*gap):
+                    by_gap.setdefault(gap, []).append(ticker)
+                else:
+                    fetched[ticker][gap] = pd.DataFrame(columns=PRICE_COLUMNS)
+
+        jobs = []
+        for (lo, hi), members in by_gap.items():
+            for i in range(0, len(members), batch_size):
+                jobs.append((members[i:i + batch_size], lo, hi))
+
+        if jobs:
+            def run(job):
+                members, lo, hi = job
+                try:
+                    return job, self.provider.download_many(members, lo, hi)
+                except Exception:
+                    return job, None
+
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+                for (members, lo, hi), frames in pool.map(run, jobs):
+                    with self._lock:
+                        self.fetches += 1
+                        self.errors += frames is None
+                    for ticker in members:
+                        fetched[ticker][(lo, hi)] = (frames or {}).get(ticker)
+
+        result = {}
+        for ticker in tickers:
+            with self._ticker_lock(ticker):
+                gaps = sorted(fetched[ticker])
+                frames = [fetched[ticker][gap] for gap in gaps]
+                result[ticker] = self._store(ticker, start, end, gaps, frames)
+        return result
+
+    # Merge fetched gap frames into the stored file and update the manifest
+    def _store(self, ticker, start, end, gaps, fetched):
+        # Today's bar is still forming, so never mark it (or the future) covered
+        covered_until = min(end, _day(pd.Timestamp.today()))
+        stored = self._read(ticker)
+        if gaps:
+            pieces = [] if stored is None else [stored]
+            for frame in fetched:
+                if frame is not None and not frame.empty:
+                    pieces.append(self._normalize(frame))
+            if pieces:
+                stored = pd.concat(pieces)
+                stored = stored[~stored.index.duplicated(keep="last")].sort_index()
+                self._write(ticker, stored)
+            # A missing result is a failed request; an empty one is a range without bars
+            new_ranges = [
+                (lo, min(hi, covered_until))
+                for (lo, hi), frame in zip(gaps, fetched)
+                if lo < covered_until and frame is not None
+            ]
+        else:
+            new_ranges = []
+
+        with self._lock:
+            if gaps:
+                self.misses += 1
+            else:
+                self.hits += 1
+            entry = self._manifest.setdefault(ticker, {"ranges": []})
+            ranges = _merge_ranges(self._covered(ticker) + new_ranges)
+            entry["ranges"] = [[lo.isoformat(), hi.isoformat()] for lo, hi in ranges]
+            entry["last_access"] = time.time()
+            entry["bytes"] = os.path.getsize(self._path(ticker)) if stored is not None else 0
+            self._evict(keep=ticker)
+            self._save_manifest()
+
+        if stored is None:
+            return pd.DataFrame(columns=PRICE_COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+        return stored[(stored.index >= start) & (stored.index < end)]
+
+    # Drop least recently used tickers until the cache fits in max_bytes
+    def _evict(self, keep=None):
+        total = sum(entry.get("bytes", 0) for entry in self._manifest.values())
+        by_age = sorted(self._manifest.items(), key=lambda item: item[1].get("last_access", 0))
+        for ticker, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if ticker == keep:
+                continue
+            try:
+                os.remove(self._path(ticker))
+            except OSError:
+                pass
+            total -= entry.get("bytes", 0)
+            del self._manifest[ticker]
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for ticker in list(self._manifest):
+                try:
+                    os.remove(self._path(ticker))
+                except OSError:
+                    pass
+            self._manifest = {}
+            self._save_manifest()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "fetches": self.fetches,
+                "errors": self.errors,
+                "evictions": self.evictions,
+                "tickers": len(self._manifest),
+                "bytes": sum(entry.get("bytes", 0) for entry in self._manifest.values()),
+            }
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
+
+
+class Profiler:
+    """Per-stage wall-clock timers and counters for one session or run.
+
+    ``stage`` times a block and records how many rows it handled (pass
+    ``rows`` up front or set it on the dict the block yields);
+    ``count`` bumps a named counter. With ``trace_memory`` the peak Python
+    and NumPy allocation of each stage is tracked through tracemalloc,
+    which slows pandas-heavy code noticeably, so it is off by default.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._stack = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        started_tracing = self.trace_memory and not tracing
+        if started_tracing:
+            tracemalloc.start()
+        frame = None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            frame = [tracemalloc.get_traced_memory()[0], 0]
+            self._stack.append(frame)
+        info = {"rows": rows}
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            seconds = time.perf_counter() - start
+            peak = None
+            if frame is not None:
+                self._stack.pop()
+                absolute = max(tracemalloc.get_traced_memory()[1], frame[1])
+                peak = absolute - frame[0]
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], absolute)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.add(name, seconds, info["rows"], peak)
+
+    def add(self, name, seconds, rows=None, peak=None):
+        """Record a stage that was timed elsewhere, e.g. on a worker thread."""
+        with self._lock:
+            entry = self.stages.setdefault(
+                name, {"calls": 0, "seconds": 0.0, "last_seconds": 0.0, "max_seconds": 0.0,
+                       "rows": 0, "peak_bytes": None},
+            )
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["last_seconds"] = seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["rows"] += rows or 0
+            if peak is not None:
+                entry["peak_bytes"] = max(entry["peak_bytes"] or 0, peak)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def frame(self):
+        rows = [
+            {
+                "Stage": name,
+                "Calls": entry["calls"],
+                "Total Seconds": entry["seconds"],
+                "Last Seconds": entry["last_seconds"],
+                "Max Seconds": entry["max_seconds"],
+                "Rows": entry["rows"],
+                "Rows/s": entry["rows"] / entry["seconds"] if entry["rows"] and entry["seconds"] else np.nan,
+                "Peak MB": entry["peak_bytes"] / 1e6 if entry["peak_bytes"] is not None else np.nan,
+            }
+            for name, entry in self.stages.items()
+        ]
+        return pd.DataFrame(rows, columns=["Stage", "Calls", "Total Seconds", "Last Seconds", "Max Seconds",
+                                           "Rows", "Rows/s", "Peak MB"])
+
+    def to_dict(self):
+        with self._lock:
+            return {"stages": {k: dict(v) for k, v in self.stages.items()}, "counters": dict(self.counters)}
+
+    def to_json(self, **extra):
+        return json.dumps(dict(self.to_dict(), **extra), indent=2, default=str)
+
+
+def stage(profiler, name, rows=None):
+    """``profiler.stage(...)``, or a no-op when no profiler is given."""
+    return profiler.stage(name, rows) if profiler is not None else nullcontext({"rows": rows})
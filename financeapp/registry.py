@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import joblib
+import pandas as pd
+
+DEFAULT_REGISTRY_DIR = os.environ.get(
+    "FINANCEAPP_REGISTRY_DIR",
+    os.path.join(os.path.expanduser("~"), ".financeapp", "models"),
+)
+
+
+class ModelRegistry:
+    """Fitted models on disk, each with the feature spec and data it came from.
+
+    Every registered model gets an immutable id and is stored as
+    ``<root>/<id>.joblib``; a JSON manifest records its name, feature
+    labels and columns, target, close column, the dataset version it was
+    trained on, parameters and metrics. ``load`` accepts either an id or a
+    name, which resolves to the name's most recent registration.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._manifest_path = os.path.join(root, "_registry.json")
+        self._cached = (None, {})
+
+    # Re-read the manifest only when another process or instance changed it
+    def _load_manifest(self):
+        try:
+            stat = os.stat(self._manifest_path)
+        except OSError:
+            return {}
+        mtime = (stat.st_mtime_ns, stat.st_size)
+        if self._cached[0] == mtime:
+            return self._cached[1]
+        try:
+            with open(self._manifest_path) as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        self._cached = (mtime, manifest)
+        return manifest
+
+    def _save_manifest(self, manifest):
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(manifest, fh, indent=2, default=str)
+        os.replace(tmp, self._manifest_path)
+
+    def _path(self, model_id):
+        return os.path.join(self.root, f"{model_id}.joblib")
+
+    def register(self, model, name, labels, columns, target, data_version,
+                 close_col="Close", params=None, metrics=None):
+        """Persist ``model`` and return its id."""
+        created = time.time()
+        model_id = hashlib.blake2b(
+            json.dumps([name, data_version, list(columns), target, created], default=str).encode(),
+            digest_size=8,
+        ).hexdigest()
+        tmp = self._path(model_id) + ".tmp"
+        joblib.dump(model, tmp)
+        os.replace(tmp, self._path(model_id))
+        entry = {
+            "id": model_id,
+            "name": name,
+            "model": type(model).__name__,
+            "labels": list(labels),
+            "columns": list(columns),
+            "target": target,
+            "close_col": close_col,
+            "data_version": data_version,
+            "params": params or {},
+            "metrics": metrics or {},
+            "created": created,
+        }
+        with self._lock:
+            manifest = dict(self._load_manifest())
+            manifest[model_id] = entry
+            self._save_manifest(manifest)
+        return model_id
+
+    def entry(self, ref):
+        """Manifest entry for a model id, or the latest model with that name."""
+        manifest = self._load_manifest()
+        if ref in manifest:
+            return manifest[ref]
+        named = [entry for entry in manifest.values() if entry["name"] == ref]
+        if not named:
+            raise KeyError(f"No registered model: {ref}")
+        return max(named, key=lambda entry: entry["created"])
+
+    def load(self, ref):
+        """Return ``(model, entry)`` for a model id or name."""
+        entry = self.entry(ref)
+        return joblib.load(self._path(entry["id"])), entry
+
+    def delete(self, model_id):
+        with self._lock:
+            manifest = dict(self._load_manifest())
+            manifest.pop(model_id, None)
+            self._save_manifest(manifest)
+        try:
+            os.remove(self._path(model_id))
+        except OSError:
+            pass
+
+    def list(self):
+        entries = sorted(self._load_manifest().values(), key=lambda entry: entry["created"], reverse=True)
+        columns = ["id", "name", "model", "target", "labels", "data_version", "created"]
+        frame = pd.DataFrame([{c: entry[c] for c in columns} for entry in entries], columns=columns)
+        frame["created"] = pd.to_datetime(frame["created"], unit="s")
+        return frame
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from financeapp.features import FEATURE_SPECS, INDICATORS, FeatureEngine
+from financeapp.models import ModelCache
+from financeapp.panel import TICKER_COL, parse_tickers, preprocess
+from financeapp.pipeline import build_features, load_prices
+from financeapp.price_store import PriceStore, completed_end
+from financeapp.registry import ModelRegistry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT = 0.005
+DEFAULT_MAX_MODELS = 8
+# Recursive indicators (EMA, MACD, RSI) never fully forget their seed; after
+# this many warm-up lengths its weight is negligible
+HISTORY_WARMUPS = 5
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+
+
+def history_days(labels):
+    """Calendar days of prices needed to compute ``labels`` on the latest bar."""
+    warmup = max((INDICATORS[name].warmup(params) for name, params in map(FEATURE_SPECS.get, labels)), default=0)
+    bars = HISTORY_WARMUPS * (warmup + 1) + 5
+    return bars * 7 // 5 + 10
+
+
+class PredictionService:
+    """Serves registered models on features computed from the price cache.
+
+    Concurrent requests for the same model are queued and drained in
+    micro-batches: up to ``max_batch`` tickers, waiting at most
+    ``max_wait`` seconds after the first request, share one price fetch,
+    one feature computation and one vectorized ``predict`` call. Loaded
+    models are kept in an LRU of ``max_models`` entries.
+    """
+
+    def __init__(self, registry=None, store=None, engine=None, max_models=DEFAULT_MAX_MODELS,
+                 max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT, latency_window=10_000):
+        self.registry = registry if registry is not None else ModelRegistry()
+        self.store = store if store is not None else PriceStore()
+        self.engine = engine if engine is not None else FeatureEngine()
+        self.models = ModelCache(max_models)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.latencies = deque(maxlen=latency_window)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self._queues = {}
+        self._workers = {}
+
+    async def _model(self, ref):
+        entry = self.registry.entry(ref)
+        hot = self.models.get(entry["id"])
+        if hot is None:
+            model, entry = await asyncio.to_thread(self.registry.load, entry["id"])
+            hot = {"model": model, "entry": entry}
+            self.models.put(entry["id"], hot)
+        return hot
+
+    async def predict(self, ref, tickers):
+        """Latest-bar predictions of model ``ref`` (id or name) for ``tickers``.
+
+        Returns ``(model_id, predictions)``, with the id the name resolved to.
+        """
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            model_id = self.registry.entry(ref)["id"]
+            queue = self._queues.get(model_id)
+            if queue is None:
+                queue = self._queues[model_id] = asyncio.Queue()
+                self._workers[model_id] = asyncio.create_task(self._drain(model_id, queue))
+            future = asyncio.get_running_loop().create_future()
+            await queue.put(([t.upper() for t in tickers], future))
+            return model_id, await future
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    async def _drain(self, model_id, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            tickers = list(dict.fromkeys(t for request, _ in batch for t in request))
+            try:
+                hot = await self._model(model_id)
+                rows = await asyncio.to_thread(self._predict_batch, hot, tickers)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_requests += len(batch)
+            for request, future in batch:
+                if not future.done():
+                    future.set_result([
+                        rows.get(t, {"ticker": t, "error": "No price data"}) for t in request
+                    ])
+
+    # Runs on a worker thread: one fetch, one feature pass and one predict per batch
+    def _predict_batch(self, hot, tickers):
+        entry = hot["entry"]
+        # Only completed sessions, so the cached range stays valid all day
+        end = completed_end()
+        start = end - pd.Timedelta(days=history_days(entry["labels"]))
+        prices = load_prices(tickers, start, end, store=self.store)
+        if prices.empty:
+            return {}
+        featured, _ = build_features(preprocess(prices), entry["labels"], entry["close_col"], self.engine)
+        latest = featured.groupby(TICKER_COL, observed=True).tail(1)
+        if latest.empty:
+            return {}
+        predictions = hot["model"].predict(latest[entry["columns"]])
+        return {
+            str(ticker): {"ticker": str(ticker), "date": f"{date:%Y-%m-%d}", "prediction": float(value)}
+            for ticker, date, value in zip(latest[TICKER_COL], latest["Date"], predictions)
+        }
+
+    def stats(self):
+        latencies = np.asarray(self.latencies) * 1e3
+        percentiles = (
+            dict(zip(("p50_ms", "p90_ms", "p99_ms"), np.percentile(latencies, [50, 90, 99]).tolist()),
+                 max_ms=float(latencies.max()))
+            if len(latencies) else {"p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None}
+        )
+        return dict(
+            percentiles,
+            requests=self.requests,
+            errors=self.errors,
+            batches=self.batches,
+            mean_batch_requests=self.batched_requests / self.batches if self.batches else None,
+            model_cache={"hits": self.models.hits, "misses": self.models.misses},
+            features=self.engine.stats(),
+            price_store=self.store.stats(),
+        )
+
+    async def close(self):
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, version = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = header.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length") or 0))
+    return method, target, version, headers, body
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, default=str).encode()
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def _route(service, method, target, body):
+    url = urlsplit(target)
+    if url.path == "/health":
+        return 200, {"status": "ok"}
+    if url.path == "/stats":
+        return 200, service.stats()
+    if url.path == "/models":
+        return 200, service.registry.list().to_dict(orient="records")
+    if url.path != "/predict":
+        return 404, {"error": f"Unknown path: {url.path}"}
+
+    if method == "POST":
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "Body must be JSON"}
+        model, tickers = request.get("model"), request.get("tickers")
+        if isinstance(tickers, str):
+            tickers = parse_tickers(tickers)
+        elif tickers is not None and not (
+            isinstance(tickers, list) and all(isinstance(t, str) for t in tickers)
+        ):
+            return 400, {"error": "'tickers' must be a list of strings or a comma-separated string"}
+    elif method == "GET":
+        query = parse_qs(url.query)
+        model = query.get("model", [None])[0]
+        tickers = parse_tickers(",".join(query.get("tickers", [])))
+    else:
+        return 405, {"error": f"Method not allowed: {method}"}
+    if not model or not tickers:
+        return 400, {"error": "Both 'model' and 'tickers' are required"}
+
+    try:
+        model_id, predictions = await service.predict(model, tickers)
+    except KeyError as e:
+        return 404, {"error": str(e.args[0])}
+    return 200, {"model": model_id, "predictions": predictions}
+
+
+async def handle_connection(service, reader, writer):
+    """Serve JSON requests on one HTTP/1.1 connection until it is closed."""
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError):
+                writer.write(_response(400, {"error": "Malformed request"}, False))
+                break
+            if request is None:
+                break
+            method, target, version, headers, body = request
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+            try:
+                status, payload = await _route(service, method, target, body)
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+
+
+def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Run the prediction service until interrupted."""
+    async def main():
+        server = await start_server(service, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,182 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, r2_score
+
+from financeapp.panel import DATE_COL, TICKER_COL
+
+
+def parallel_map(fn, tasks, n_jobs=1, initializer=None, initargs=()):
+    """``[fn(*args) for args in tasks]``, on a process pool unless ``n_jobs`` is 1.
+
+    ``n_jobs=-1`` uses every core. ``initializer(*initargs)`` runs once per
+    worker process, or once in this process when running serially.
+    """
+    tasks = list(tasks)
+    workers = os.cpu_count() if n_jobs == -1 else n_jobs
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=initializer,
+                                 initargs=initargs) as pool:
+            return list(pool.map(fn, *zip(*tasks)))
+    if initializer is not None:
+        initializer(*initargs)
+    return [fn(*args) for args in tasks]
+
+
+# Row positions of each distinct period (date), in chronological order
+def _periods(df):
+    if DATE_COL in df.columns:
+        _, inverse = np.unique(df[DATE_COL].to_numpy(), return_inverse=True)
+        return inverse
+    return np.arange(len(df))
+
+
+# Chronological holdout: the last ``test_size`` fraction of dates is the test set
+def time_split(df, test_size=0.3):
+    periods = _periods(df)
+    n_periods = periods.max() + 1 if len(periods) else 0
+    cutoff = n_periods - max(1, int(round(n_periods * test_size)))
+    return np.flatnonzero(periods < cutoff), np.flatnonzero(periods >= cutoff)
+
+
+def walk_forward_splits(n_periods, n_splits=5, test_size=None, min_train=None,
+                        window="expanding", train_size=None, gap=0):
+    """Return ``[((train_lo, train_hi), (test_lo, test_hi)), ...]`` in periods.
+
+    Test blocks are consecutive and non-overlapping. ``gap`` periods are
+    left out between the end of training and the start of testing (an
+    embargo against label overlap). With ``window="sliding"`` training uses
+    only the ``train_size`` periods before the gap.
+    """
+    if window not in ("expanding", "sliding"):
+        raise ValueError(f"Unknown window type: {window}")
+    if test_size is None:
+        test_size = (n_periods - gap) // (n_splits + 1)
+    if min_train is None:
+        min_train = n_periods - gap - n_splits * test_size
+    if train_size is None:
+        train_size = min_train
+    if test_size < 1 or min_train < 1 or min_train + gap + test_size > n_periods:
+        raise ValueError(
+            f"Not enough periods ({n_periods}) for {n_splits} folds of {test_size} "
+            f"with {min_train} training periods and a gap of {gap}"
+        )
+
+    splits = []
+    train_hi = min_train
+    while len(splits) < n_splits and train_hi + gap + test_size <= n_periods:
+        train_lo = 0 if window == "expanding" else max(0, train_hi - train_size)
+        test_lo = train_hi + gap
+        splits.append(((train_lo, train_hi), (test_lo, test_lo + test_size)))
+        train_hi += test_size
+    return splits
+
+
+# Fit once on the first fold of a refit group, then score every fold in it
+def _run_group(estimator, X, y, periods, dates, folds, ticker):
+    records = []
+    predictions = []
+    model = None
+    for fold, ((train_lo, train_hi), (test_lo, test_hi)) in folds:
+        started = time.perf_counter()
+        fit_seconds = 0.0
+        if model is None:
+            train = (periods >= train_lo) & (periods < train_hi)
+            model = clone(estimator)
+            model.fit(X[train], y[train])
+            fit_seconds = time.perf_counter() - started
+            fitted_on = (train_lo, train_hi, int(train.sum()))
+        else:
+            # Folds between refits report the window the reused model saw
+            train_lo, train_hi = fitted_on[:2]
+        test = np.flatnonzero((periods >= test_lo) & (periods < test_hi))
+        predict_started = time.perf_counter()
+        y_pred = model.predict(X[test]) if len(test) else np.empty(0)
+        predict_seconds = time.perf_counter() - predict_started
+        y_true = y[test]
+        records.append({
+            "Fold": fold,
+            "Ticker": ticker,
+            "Train Start": dates[train_lo],
+            "Train End": dates[train_hi - 1],
+            "Test Start": dates[test_lo],
+            "Test End": dates[test_hi - 1],
+            "Train Rows": fitted_on[2],
+            "Test Rows": len(test),
+            "Refit": fit_seconds > 0,
+            "MSE": mean_squared_error(y_true, y_pred) if len(test) else np.nan,
+            "R2": r2_score(y_true, y_pred) if len(test) > 1 else np.nan,
+            "Fit Seconds": fit_seconds,
+            "Predict Seconds": predict_seconds,
+            "Seconds": time.perf_counter() - started,
+        })
+        predictions.append((test, y_true, y_pred))
+    return records, predictions
+
+
+def walk_forward(df, features, target, estimator, n_splits=5, test_size=None,
+                 min_train=None, window="expanding", train_size=None, gap=0,
+                 refit_every=1, per_ticker=False, n_jobs=1):
+    """Walk-forward backtest of ``estimator`` on ``df``.
+
+    Folds are cut on dates, so every ticker of a panel shares the same
+    boundaries. The model is refit on every ``refit_every``-th fold and
+    reused in between. Each refit group (and each ticker, with
+    ``per_ticker``) is independent and is spread over ``n_jobs`` processes.
+
+    Returns ``(folds, summary, predictions)``: one row per fold and ticker,
+    aggregated metrics, and out-of-sample predictions aligned to ``df``.
+    """
+    periods = _periods(df)
+    if DATE_COL in df.columns:
+        dates = np.unique(df[DATE_COL].to_numpy())
+    else:
+        dates = np.arange(len(df))
+    splits = walk_forward_splits(len(dates), n_splits, test_size, min_train, window, train_size, gap)
+    groups = [
+        list(enumerate(splits))[i:i + refit_every]
+        for i in range(0, len(splits), refit_every)
+    ]
+
+    X = df[features].to_numpy(dtype=np.float64)
+    y = df[target].to_numpy(dtype=np.float64)
+    if per_ticker and TICKER_COL in df.columns:
+        subsets = list(df.groupby(TICKER_COL, observed=True, sort=False).indices.items())
+    else:
+        subsets = [(None, np.arange(len(df)))]
+
+    tasks = []
+    for ticker, rows in subsets:
+        for folds in groups:
+            tasks.append((rows, (estimator, X[rows], y[rows], periods[rows], dates, folds, ticker)))
+
+    results = parallel_map(_run_group, (args for _, args in tasks), n_jobs)
+
+    records = []
+    predicted = np.full(len(df), np.nan)
+    for (rows, _), (group_records, group_predictions) in zip(tasks, results):
+        records.extend(group_records)
+        for test, _, y_pred in group_predictions:
+            predicted[rows[test]] = y_pred
+
+    folds = pd.DataFrame(records).sort_values(["Fold", "Ticker"], na_position="first")
+    folds = folds.reset_index(drop=True)
+    if not per_ticker or TICKER_COL not in df.columns:
+        folds = folds.drop(columns="Ticker")
+
+    scored = ~np.isnan(predicted)
+    summary = {
+        "Folds": len(splits),
+        "Mean MSE": folds["MSE"].mean(),
+        "Std MSE": folds["MSE"].std(),
+        "Mean R2": folds["R2"].mean(),
+        "Std R2": folds["R2"].std(),
+        "Out-of-sample MSE": mean_squared_error(y[scored], predicted[scored]),
+        "Out-of-sample R2": r2_score(y[scored], predicted[scored]),
+        "Total Seconds": folds["Seconds"].sum(),
+    }
+    return folds, summary, pd.Series(predicted, index=df.index, name="Predicted")
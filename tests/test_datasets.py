@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from financeapp.datasets import DatasetStore
+
+
+def frame(offset):
+    return pd.DataFrame({"x": np.arange(10_000, dtype=np.float64) + offset})
+
+
+def test_versions_survive_the_byte_budget(tmp_path):
+    size = int(frame(0).memory_usage(index=True).sum())
+    store = DatasetStore(max_bytes=size * 2, spill_dir=str(tmp_path))
+    snapshots = [store.put_raw(frame(i)) for i in range(5)]
+    assert store.nbytes <= size * 2
+    assert not snapshots[0].loaded
+
+    for i, snapshot in enumerate(snapshots):
+        assert store.get(snapshot.version) is snapshot
+        pd.testing.assert_frame_equal(snapshot.frame, frame(i))
+    assert store.nbytes <= size * 2
+
+
+def test_unloaded_derived_frames_are_rebuilt(tmp_path):
+    size = int(frame(0).memory_usage(index=True).sum())
+    store = DatasetStore(max_bytes=size * 3, spill_dir=str(tmp_path))
+    calls = []
+
+    def double(parent):
+        calls.append(parent)
+        return parent.assign(y=parent["x"] * 2)
+
+    raw = store.put_raw(frame(0))
+    derived, built = store.derive(raw, "preprocessed", {}, double)
+    assert built and store.derive(raw, "preprocessed", {}, double) == (derived, False)
+    for i in range(1, 4):
+        store.put_raw(frame(i))
+    assert not derived.loaded
+
+    assert derived.frame["y"].iloc[3] == 6.0
+    assert len(calls) == 2
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from financeapp.features import FEATURE_SPECS, FeatureEngine
+from financeapp.panel import TICKER_COL
+
+LABELS = list(FEATURE_SPECS)
+TICKERS = ["AAA", "BBB", "CCC"]
+
+
+def panel(n, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for ticker in TICKERS:
+        ret = rng.normal(0, 0.01, n)
+        close = 100 * np.exp(np.cumsum(ret))
+        frames.append(pd.DataFrame({TICKER_COL: ticker, "Close": close, "High": close * (1 + rng.uniform(0, 0.02, n)),
+                                    "Low": close * (1 - rng.uniform(0, 0.02, n)), "Return": ret}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def head(df, n):
+    return df.groupby(TICKER_COL, sort=False).head(n)
+
+
+def test_appended_rows_match_a_full_recompute():
+    full = panel(300)
+    engine = FeatureEngine()
+    engine.compute(head(full, 250), LABELS)
+    incremental = engine.compute(full, LABELS)
+    assert engine.incremental == len(LABELS) * len(TICKERS)
+
+    expected = FeatureEngine().compute(full, LABELS)
+    pd.testing.assert_frame_equal(incremental, expected, check_exact=False, rtol=1e-12, atol=1e-12)
+    pd.testing.assert_frame_equal(engine.compute(full, LABELS), incremental)
+    assert engine.hits == len(LABELS) * len(TICKERS)
+
+
+def test_memo_stays_within_its_byte_budget():
+    engine = FeatureEngine()
+    engine.compute(panel(300), LABELS)
+    size = engine.bytes
+    small = FeatureEngine(max_bytes=size // 2)
+    small.compute(panel(300), LABELS)
+    assert 0 < small.bytes <= size // 2
+    assert small.stats()["entries"] < engine.stats()["entries"]
+
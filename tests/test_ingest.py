@@ -0,0 +1,71 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from financeapp.ingest import ingest_csv
+
+
+def write_csv(tmp_path, lines, name="data.csv"):
+    path = tmp_path / name
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_integers_and_floats_keep_every_digit(tmp_path):
+    lines = ["Date,Volume,Id,Close"]
+    lines += [f"2024-01-{day:02d},{123456789 + day},{9_000_000_000 + day},{100.25 + day}" for day in range(1, 29)]
+    handle = ingest_csv(write_csv(tmp_path, lines), out_dir=str(tmp_path / "out"), chunksize=10)
+    assert handle.report["column_types"] == {"Date": "datetime", "Volume": "int32", "Id": "int64",
+                                             "Close": "float32"}
+
+    frame = handle.read()
+    expected = pd.read_csv(write_csv(tmp_path, lines), parse_dates=["Date"])
+    assert frame["Volume"].tolist() == expected["Volume"].tolist()
+    assert frame["Id"].tolist() == expected["Id"].tolist()
+    assert frame["Close"].astype(str).tolist() == expected["Close"].astype(str).tolist()
+
+
+def test_later_chunks_widen_columns(tmp_path):
+    lines = ["Date,Volume,Price,Flag,Note"]
+    lines += [f"2024-01-{day:02d},{day},1.5,true,a" for day in range(1, 11)]
+    lines += ["2024-01-11,70000,3.141592653589793,maybe,b", "2024-01-12,,,,"]
+    handle = ingest_csv(write_csv(tmp_path, lines), out_dir=str(tmp_path / "out"), chunksize=5)
+    assert handle.report["widened"] == {"Volume": "int32", "Price": "float64", "Flag": "string"}
+
+    frame = handle.read()
+    assert len(frame) == 12
+    assert frame["Volume"].iloc[10] == 70000 and pd.isna(frame["Volume"].iloc[11])
+    assert frame["Price"].iloc[10] == 3.141592653589793
+    assert frame["Flag"].iloc[:2].str.lower().tolist() == ["true", "true"] and frame["Flag"].iloc[10] == "maybe"
+
+
+class Unseekable(io.StringIO):
+    def __getattribute__(self, name):
+        if name in ("tell", "seek"):
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+
+def test_streams_that_cannot_rewind_refuse_to_widen(tmp_path):
+    lines = ["x"] + [str(i) for i in range(10)] + ["1.5"]
+    with pytest.raises(ValueError):
+        ingest_csv(Unseekable("\n".join(lines)), out_dir=str(tmp_path), chunksize=5)
+    # The partial file is removed
+    assert os.listdir(tmp_path) == []
+
+
+def test_same_content_reuses_its_file(tmp_path):
+    lines = ["Date,Close"] + [f"2024-01-{day:02d},{day}.5" for day in range(1, 29)]
+    out = str(tmp_path / "out")
+    first = ingest_csv(write_csv(tmp_path, lines, "a.csv"), out_dir=out, name="prices.csv")
+    second = ingest_csv(write_csv(tmp_path, lines, "b.csv"), out_dir=out, name="prices.csv")
+    assert first.path == second.path
+    assert os.listdir(out) == [os.path.basename(first.path)]
+
+    other = ingest_csv(write_csv(tmp_path, lines[:10], "c.csv"), out_dir=out, name="prices.csv",
+                       max_bytes=os.path.getsize(first.path))
+    assert os.listdir(out) == [os.path.basename(other.path)]
+    np.testing.assert_allclose(other.read()["Close"], np.arange(1, 10) + 0.5)
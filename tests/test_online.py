@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from financeapp.features import FEATURE_SPECS, FeatureEngine, StreamingFeatures
+from financeapp.online import OnlineLinearRegression
+from financeapp.panel import TICKER_COL
+
+LABELS = list(FEATURE_SPECS)
+
+
+def regression(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0, 1, (n, 4)) + [0.0, 5.0, -3.0, 10.0]
+    y = X @ [0.5, -1.0, 2.0, 0.1] + 3.0 + rng.normal(0, 0.1, n)
+    return X, y
+
+
+def test_batches_match_weighted_least_squares():
+    X, y = regression(500)
+    forgetting = 0.99
+    model = OnlineLinearRegression(forgetting=forgetting, ridge=0.0)
+    for batch in np.array_split(np.arange(len(y)), [1, 50, 51, 300]):
+        model.partial_fit(X[batch], y[batch])
+
+    weights = forgetting ** np.arange(len(y) - 1, -1, -1)
+    expected = LinearRegression().fit(X, y, sample_weight=weights)
+    np.testing.assert_allclose(model.coef_, expected.coef_, rtol=0, atol=1e-10)
+    np.testing.assert_allclose(model.intercept_, expected.intercept_, rtol=0, atol=1e-10)
+    np.testing.assert_allclose(model.predict(X), expected.predict(X), rtol=0, atol=1e-10)
+
+
+def test_fit_restarts_and_skips_missing_rows():
+    X, y = regression(200, seed=1)
+    y_missing = y.copy()
+    y_missing[::7] = np.nan
+    model = OnlineLinearRegression(ridge=0.0).fit(X[:20], y[:20]).fit(X, y_missing)
+    ok = ~np.isnan(y_missing)
+    expected = LinearRegression().fit(X[ok], y[ok])
+    np.testing.assert_allclose(model.coef_, expected.coef_, rtol=0, atol=1e-10)
+
+
+def panel(n, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for ticker in ["AAA", "BBB", "CCC"]:
+        ret = rng.normal(0, 0.01, n)
+        close = 100 * np.exp(np.cumsum(ret))
+        frames.append(pd.DataFrame({TICKER_COL: ticker, "Close": close, "High": close * (1 + rng.uniform(0, 0.02, n)),
+                                    "Low": close * (1 - rng.uniform(0, 0.02, n)), "Return": ret}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_streaming_updates_match_a_full_recompute():
+    full = panel(300)
+    position = full.groupby(TICKER_COL, sort=False).cumcount()
+    stream = StreamingFeatures(LABELS)
+    parts = [stream.prime(full[position < 200]),
+             stream.update(full[position == 200]),
+             stream.update(full[position > 200])]
+    streamed = pd.concat(parts).loc[full.index]
+
+    # Rolling sums are centred on each call's own inputs, so z-scores differ in the last digits
+    expected = FeatureEngine().compute(full, LABELS)[stream.columns]
+    pd.testing.assert_frame_equal(streamed, expected, check_exact=False, rtol=1e-12, atol=1e-11)
@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from financeapp.price_store import FrameProvider, PriceStore, _missing_ranges
+
+DATES = pd.bdate_range("2024-01-01", "2024-06-28")
+
+
+def ts(value):
+    return pd.Timestamp(value)
+
+
+def bars(seed=0):
+    close = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, len(DATES)))
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1e6},
+                        index=DATES)
+
+
+@pytest.fixture
+def provider():
+    return FrameProvider({"AAA": bars(0), "BBB": bars(1), "CCC": bars(2)})
+
+
+class FlakyProvider(FrameProvider):
+    """Fails the first ``failures`` requests, like a rate-limited API."""
+
+    def __init__(self, frames, failures=1):
+        super().__init__(frames)
+        self.failures = failures
+
+    def download(self, ticker, start, end):
+        if self.failures:
+            self.failures -= 1
+            self.calls.append((ticker, start, end))
+            raise ConnectionError("rate limited")
+        return super().download(ticker, start, end)
+
+    def download_many(self, tickers, start, end):
+        if self.failures:
+            self.failures -= 1
+            self.calls.append((tuple(tickers), start, end))
+            raise ConnectionError("rate limited")
+        return super().download_many(tickers, start, end)
+
+
+def test_missing_ranges():
+    covered = [(ts("2024-01-10"), ts("2024-01-20")), (ts("2024-02-01"), ts("2024-02-10"))]
+    assert _missing_ranges([], ts("2024-01-01"), ts("2024-01-05")) == [(ts("2024-01-01"), ts("2024-01-05"))]
+    assert _missing_ranges(covered, ts("2024-01-12"), ts("2024-01-18")) == []
+    assert _missing_ranges(covered, ts("2024-01-01"), ts("2024-02-15")) == [
+        (ts("2024-01-01"), ts("2024-01-10")),
+        (ts("2024-01-20"), ts("2024-02-01")),
+        (ts("2024-02-10"), ts("2024-02-15")),
+    ]
+
+
+def test_get_only_fetches_missing_dates(tmp_path, provider):
+    store = PriceStore(str(tmp_path), provider)
+    first = store.get("AAA", "2024-01-01", "2024-02-01")
+    assert len(first) == len(DATES[DATES < "2024-02-01"])
+
+    combined = store.get("AAA", "2024-01-01", "2024-03-01")
+    assert provider.calls[-1][1:] == (ts("2024-02-01"), ts("2024-03-01"))
+    assert len(provider.calls) == 2
+    pd.testing.assert_series_equal(
+        combined["Close"], bars(0).loc["2024-01-01":"2024-02-29", "Close"], check_names=False, check_freq=False
+    )
+
+    store.get("AAA", "2024-01-15", "2024-02-15")
+    assert len(provider.calls) == 2
+
+
+def test_hit_and_miss_counters(tmp_path, provider):
+    store = PriceStore(str(tmp_path), provider)
+    store.get("AAA", "2024-01-01", "2024-02-01")
+    store.get("AAA", "2024-01-01", "2024-02-01")
+    store.get_many(["AAA", "BBB"], "2024-01-01", "2024-02-01")
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["fetches"]) == (2, 2, 2)
+    assert stats["tickers"] == 2
+
+
+def test_cache_persists_across_instances(tmp_path, provider):
+    PriceStore(str(tmp_path), provider).get("AAA", "2024-01-01", "2024-02-01")
+    store = PriceStore(str(tmp_path), provider)
+    assert len(store.get("AAA", "2024-01-01", "2024-02-01")) > 0
+    assert len(provider.calls) == 1
+
+
+def test_lru_eviction(tmp_path, provider):
+    store = PriceStore(str(tmp_path), provider)
+    store.get("AAA", "2024-01-01", "2024-07-01")
+    size = os.path.getsize(store._path("AAA"))
+    store.max_bytes = int(size * 2.5)
+
+    store.get("BBB", "2024-01-01", "2024-07-01")
+    store.get("AAA", "2024-01-01", "2024-07-01")
+    store.get("CCC", "2024-01-01", "2024-07-01")
+
+    assert store.evictions == 1
+    assert not os.path.exists(store._path("BBB"))
+    assert os.path.exists(store._path("AAA")) and os.path.exists(store._path("CCC"))
+    store.get("BBB", "2024-01-01", "2024-07-01")
+    assert provider.calls[-1][0] == "BBB"
+
+
+def test_failed_fetch_is_retried(tmp_path, provider):
+    flaky = FlakyProvider(provider.frames)
+    store = PriceStore(str(tmp_path), flaky)
+    with pytest.raises(ConnectionError):
+        store.get("AAA", "2024-01-01", "2024-02-01")
+    assert len(store.get("AAA", "2024-01-01", "2024-02-01")) > 0
+    assert len(flaky.calls) == 2
+    assert store.stats()["errors"] == 1
+
+
+def test_failed_batch_is_retried(tmp_path, provider):
+    flaky = FlakyProvider(provider.frames)
+    store = PriceStore(str(tmp_path), flaky)
+    assert all(frame.empty for frame in store.get_many(["AAA", "BBB"], "2024-01-01", "2024-02-01").values())
+    assert store._covered("AAA") == []
+    assert all(len(frame) for frame in store.get_many(["AAA", "BBB"], "2024-01-01", "2024-02-01").values())
+    assert len(flaky.calls) == 3
+
+
+def test_ranges_without_bars_are_covered(tmp_path, provider):
+    store = PriceStore(str(tmp_path), provider)
+    store.get("AAA", "2024-01-01", "2024-03-30")
+    # [Mar 30, Apr 1) is a weekend: covered without asking the provider
+    for _ in range(3):
+        store.get("AAA", "2024-01-01", "2024-04-01")
+    assert len(provider.calls) == 1
+    assert (store.hits, store.misses) == (2, 2)
+
+    # A weekday range the provider has no bars for is asked for once
+    provider.frames["AAA"] = provider.frames["AAA"].drop(pd.Timestamp("2024-04-01"))
+    store.get("AAA", "2024-01-01", "2024-04-02")
+    store.get("AAA", "2024-01-01", "2024-04-02")
+    assert len(provider.calls) == 2
+
+
+def test_get_many_does_not_cover_unknown_tickers(tmp_path, provider):
+    store = PriceStore(str(tmp_path), provider)
+    frames = store.get_many(["AAA", "ZZZ"], "2024-01-01", "2024-02-01")
+    assert frames["ZZZ"].empty and not frames["AAA"].empty
+    assert store._covered("ZZZ") == []
+    store.get_many(["ZZZ"], "2024-01-01", "2024-02-01")
+    assert provider.calls[-1][0] == "ZZZ"
@@ -0,0 +1,98 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from financeapp import serving
+from financeapp.features import FeatureEngine
+from financeapp.panel import TICKER_COL, preprocess
+from financeapp.pipeline import build_features, load_prices
+from financeapp.price_store import FrameProvider, PriceStore
+from financeapp.registry import ModelRegistry
+
+LABELS = ["MA_7", "MA_30", "Volatility"]
+TICKERS = [f"T{i}" for i in range(8)]
+# Complete bars only: the service never asks for the current day
+DATES = pd.bdate_range(end=pd.Timestamp.today().normalize() - pd.Timedelta(days=1), periods=400)
+
+
+def bars(seed):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, len(DATES))))
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": 1e6}, index=DATES)
+
+
+@pytest.fixture
+def setup(tmp_path):
+    provider = FrameProvider({ticker: bars(seed) for seed, ticker in enumerate(TICKERS)})
+    store = PriceStore(str(tmp_path / "prices"), provider)
+    prices = load_prices(TICKERS, DATES[0], DATES[-1] + pd.Timedelta(days=1), store=store)
+    featured, columns = build_features(preprocess(prices), LABELS)
+    featured = featured.dropna(subset=columns + ["Return"])
+    model = LinearRegression().fit(featured[columns], featured["Return"])
+    registry = ModelRegistry(str(tmp_path / "models"))
+    model_id = registry.register(model, "lr", LABELS, columns, "Return", "v1")
+
+    latest = featured.groupby(TICKER_COL, observed=True).tail(1)
+    expected = dict(zip(latest[TICKER_COL].astype(str), model.predict(latest[columns])))
+    service = serving.PredictionService(registry, store, FeatureEngine(), max_wait=0.05)
+    return service, provider, model_id, expected
+
+
+def test_concurrent_requests_share_batches(setup):
+    service, provider, model_id, expected = setup
+
+    async def run():
+        requests = [service.predict("lr", [TICKERS[i % 8], TICKERS[(i + 3) % 8]]) for i in range(40)]
+        results = await asyncio.gather(*requests)
+        calls = len(provider.calls)
+        again = await service.predict("lr", TICKERS)
+        await service.close()
+        return results, calls, again
+
+    results, calls, (again_id, again) = asyncio.run(run())
+    assert service.batches == 2
+    assert service.batched_requests == 41
+    assert {model for model, _ in results} == {model_id}
+    for _, predictions in results:
+        for row in predictions:
+            assert row["prediction"] == pytest.approx(expected[row["ticker"]], abs=1e-6)
+    assert again_id == model_id
+    assert [row["ticker"] for row in again] == TICKERS
+    # The cached window is reused, so later batches do not call the provider
+    assert len(provider.calls) == calls
+
+
+def test_unknown_model_and_ticker(setup):
+    service, _, model_id, expected = setup
+
+    async def run():
+        missing = await serving._route(service, "POST", "/predict", b'{"model": "nope", "tickers": ["T1"]}')
+        mixed = await serving._route(service, "GET", f"/predict?model={model_id}&tickers=t1,NOPE", b"")
+        await service.close()
+        return missing, mixed
+
+    missing, (status, payload) = asyncio.run(run())
+    assert missing == (404, {"error": "No registered model: nope"})
+    assert status == 200
+    assert payload["model"] == model_id
+    known, unknown = payload["predictions"]
+    assert known["ticker"] == "T1"
+    assert known["prediction"] == pytest.approx(expected["T1"], abs=1e-6)
+    assert unknown == {"ticker": "NOPE", "error": "No price data"}
+
+
+@pytest.mark.parametrize("body", [
+    b'{"model": "lr", "tickers": 123}',
+    b'{"model": "lr", "tickers": [1, 2]}',
+    b'{"model": "lr"}',
+    b'{"tickers": ["T1"]}',
+    b"not json",
+])
+def test_bad_requests(setup, body):
+    service = setup[0]
+    status, payload = asyncio.run(serving._route(service, "POST", "/predict", body))
+    assert status == 400
+    assert "error" in payload
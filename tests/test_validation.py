@@ -0,0 +1,35 @@
+import pytest
+
+from financeapp.validation import walk_forward_splits
+
+
+def test_expanding_splits_leave_a_gap():
+    splits = walk_forward_splits(100, n_splits=4, test_size=10, gap=5)
+    assert splits == [((0, 55), (60, 70)), ((0, 65), (70, 80)), ((0, 75), (80, 90)), ((0, 85), (90, 100))]
+    for (_, train_hi), (test_lo, _) in splits:
+        assert test_lo - train_hi == 5
+
+
+def test_sliding_splits_keep_a_fixed_window():
+    splits = walk_forward_splits(100, n_splits=3, test_size=10, gap=2, window="sliding", train_size=20)
+    assert splits == [((48, 68), (70, 80)), ((58, 78), (80, 90)), ((68, 88), (90, 100))]
+    # Test blocks are consecutive and never overlap training
+    tests = [test for _, test in splits]
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(tests, tests[1:]))
+    assert all(train_hi <= test_lo for (_, train_hi), (test_lo, _) in splits)
+
+
+def test_default_sizes_use_every_period():
+    splits = walk_forward_splits(62, n_splits=5, gap=2)
+    assert len(splits) == 5
+    assert splits[-1][1][1] == 62
+    assert all(hi - lo == 10 for _, (lo, hi) in splits)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"n_splits": 5, "test_size": 10, "min_train": 60, "gap": 1},
+    {"n_splits": 2, "window": "rolling"},
+])
+def test_bad_splits(kwargs):
+    with pytest.raises(ValueError):
+        walk_forward_splits(70, **kwargs)